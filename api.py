@@ -0,0 +1,124 @@
+# api.py
+import base64
+import json
+
+from flask import current_app, jsonify, request, Response, stream_with_context
+from flask_login import login_required, current_user
+
+from helpers import get_link_index
+from pagecache import page_etag, conditional_page
+
+# Public field name -> Link attribute
+LINK_FIELDS = {
+    "title": "Title",
+    "href": "href",
+    "target": "target",
+    "icon": "Icon",
+    "team": "Team",
+    "url": "URL",
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _api_error(status, message):
+    response = jsonify({"error": message})
+    response.status_code = status
+    return response
+
+
+def encode_cursor(offset, version):
+    raw = f"{offset}:{page_etag(version)}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return (offset, version token) or raise ValueError."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    offset, token = base64.urlsafe_b64decode(padded.encode()).decode().split(":", 1)
+    # Only what encode_cursor writes: a non-negative decimal integer
+    if not (offset.isascii() and offset.isdigit()):
+        raise ValueError(f"Invalid cursor offset: {offset!r}")
+    return int(offset), token
+
+
+def _parse_fields(raw):
+    if not raw:
+        return list(LINK_FIELDS)
+    fields = [f.strip().lower() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in LINK_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def _stream_links(team, links, fields, next_cursor):
+    """Yield the JSON document piece by piece instead of building it in memory."""
+    attrs = [(name, LINK_FIELDS[name]) for name in fields]
+    yield '{"team": ' + json.dumps(team) + ', "links": ['
+    for i, link in enumerate(links):
+        item = {name: getattr(link, attr) for name, attr in attrs}
+        yield ("," if i else "") + json.dumps(item)
+    yield '], "next_cursor": ' + json.dumps(next_cursor) + "}"
+
+
+def register_api(app):
+    """Attach the read-only JSON links API."""
+
+    @app.route("/api/teams")
+    @login_required
+    def api_teams():
+        index = get_link_index(current_app.config["LINKS_SOURCE"])
+        teams = sorted(t for t in index.teams if current_user.has_team(t))
+        etag = page_etag("api-teams", index.version, *teams)
+
+        def render():
+            return jsonify({
+                "teams": [{"name": t, "links": len(index.links(t))} for t in teams],
+            })
+
+        return conditional_page(etag, render)
+
+    @app.route("/api/teams/<team_name>/links")
+    @login_required
+    def api_team_links(team_name):
+        team_name = team_name.lower()
+        if not current_user.has_team(team_name):
+            return _api_error(403, "Unauthorized or unknown team")
+
+        try:
+            fields = _parse_fields(request.args.get("fields"))
+            limit = min(int(request.args.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+            if limit < 1:
+                raise ValueError("limit must be positive")
+        except ValueError as e:
+            return _api_error(400, str(e))
+
+        index = get_link_index(current_app.config["LINKS_SOURCE"])
+        version_token = page_etag(index.version)
+
+        offset = 0
+        cursor = request.args.get("cursor")
+        if cursor:
+            try:
+                offset, token = decode_cursor(cursor)
+            except (ValueError, UnicodeDecodeError):
+                return _api_error(400, "Invalid cursor")
+            if token != version_token:
+                # The workbook changed under the client; restart from page one
+                return _api_error(410, "Cursor expired, links changed")
+
+        links = index.links(team_name)
+        page = links[offset:offset + limit]
+        next_cursor = encode_cursor(offset + limit, index.version) if offset + limit < len(links) else None
+
+        etag = page_etag("api-links", team_name, index.version, offset, limit, ",".join(fields))
+
+        def render():
+            return Response(
+                stream_with_context(_stream_links(team_name, page, fields, next_cursor)),
+                mimetype="application/json",
+            )
+
+        return conditional_page(etag, render)
@@ -0,0 +1,117 @@
+# assets.py
+import gzip
+import hashlib
+import os
+import re
+
+from flask import request, url_for, abort, Response
+
+try:
+    import brotli
+except ImportError:   # optional: gzip only
+    brotli = None
+
+# Bundle name -> source files under static/, concatenated in order
+BUNDLES = {
+    "app.css": ["css/styles.css", "css/index.css"],
+    "app.js": ["js/base.js", "js/index.js"],
+    "login.css": ["css/login.css"],
+    "login.js": ["js/login.js"],
+}
+
+CONTENT_TYPES = {".css": "text/css; charset=utf-8", ".js": "text/javascript; charset=utf-8"}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+# -----------------
+# Minifiers (conservative: whitespace and comments only)
+# -----------------
+def minify_css(source):
+    source = re.sub(r"/\*.*?\*/", "", source, flags=re.S)
+    source = re.sub(r"\s+", " ", source)
+    source = re.sub(r"\s*([{};,])\s*", r"\1", source)
+    source = re.sub(r":\s+", ":", source)
+    return source.replace(";}", "}").strip()
+
+
+def minify_js(source):
+    """Drop indentation, blank lines and whole-line // comments."""
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+
+# -----------------
+# Built bundles
+# -----------------
+class Asset:
+    """One fingerprinted bundle with its precompressed bodies."""
+
+    __slots__ = ("name", "url_name", "content_type", "etag", "body", "gzip", "br")
+
+    def __init__(self, name, content):
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        self.name = name
+        self.url_name = f"{stem}.{digest}{ext}"
+        self.content_type = CONTENT_TYPES.get(ext, "application/octet-stream")
+        self.etag = digest
+        self.body = content
+        self.gzip = gzip.compress(content, compresslevel=9, mtime=0)
+        self.br = brotli.compress(content) if brotli is not None else None
+
+
+def build_assets(static_folder, bundles=BUNDLES):
+    """Concatenate, minify and compress every bundle. Returns {name: Asset}."""
+    assets = {}
+    for name, sources in bundles.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_folder, source), encoding="utf-8") as fh:
+                parts.append(fh.read())
+        minify = minify_css if name.endswith(".css") else minify_js
+        assets[name] = Asset(name, minify("\n".join(parts)).encode("utf-8"))
+    return assets
+
+
+def register_assets(app):
+    """
+    Build the bundles once at startup and serve them from memory under
+    /assets/<name>.<hash>.<ext> with immutable caching. Templates use
+    asset_url('app.css') to get the fingerprinted URL.
+    The bundle fingerprints are folded into TEMPLATE_VERSION, so page
+    ETags change when an asset does.
+    """
+    assets = build_assets(app.static_folder)
+    by_url_name = {asset.url_name: asset for asset in assets.values()}
+    app.extensions["assets"] = assets
+
+    manifest = hashlib.sha1("|".join(sorted(by_url_name)).encode()).hexdigest()[:12]
+    app.config["TEMPLATE_VERSION"] = f"{app.config.get('TEMPLATE_VERSION', '')}-{manifest}"
+
+    def asset_url(name):
+        return url_for("asset", filename=assets[name].url_name)
+
+    app.jinja_env.globals["asset_url"] = asset_url
+
+    @app.route("/assets/<filename>")
+    def asset(filename):
+        found = by_url_name.get(filename)
+        if found is None:
+            abort(404)
+
+        accepted = request.accept_encodings
+        if found.br is not None and accepted["br"]:
+            body, encoding = found.br, "br"
+        elif accepted["gzip"]:
+            body, encoding = found.gzip, "gzip"
+        else:
+            body, encoding = found.body, None
+
+        response = Response(body, content_type=found.content_type)
+        if encoding:
+            response.content_encoding = encoding
+        response.vary.add("Accept-Encoding")
+        response.set_etag(found.etag)
+        response.headers["Cache-Control"] = IMMUTABLE
+        return response.make_conditional(request)
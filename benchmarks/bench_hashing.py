@@ -0,0 +1,39 @@
+# benchmarks/bench_hashing.py
+"""
+Password hashing throughput of models.hash_passwords by worker count.
+
+    python benchmarks/bench_hashing.py --count 64 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import hash_passwords  # noqa: E402
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=32, help="passwords to hash")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, cpus, cpus * 2}))
+    args = parser.parse_args()
+
+    passwords = [f"password-{i}" for i in range(args.count)]
+    print(f"{args.count} passwords, {cpus} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'hashes/s':>10} {'speedup':>8}")
+
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        hash_passwords(passwords, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {args.count / elapsed:>10.1f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_ingest.py
+"""
+Peak memory and time of the pandas and streaming (openpyxl read-only)
+workbook readers. The synthetic sheet carries unused columns so column
+projection shows up in the numbers.
+
+    python benchmarks/bench_ingest.py --rows 10000 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import _ExcelSource, _StreamingExcelSource  # noqa: E402
+
+
+def make_workbook(path, rows):
+    """One sheet of `rows` links plus three columns the app never reads."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("links")
+    sheet.append(["Team / Title", "URL", "Icon", "Owner", "Notes", "Last Reviewed"])
+    for i in range(rows):
+        sheet.append([
+            f"tool {i}", f"https://example.com/tools/{i}", "fa-link",
+            f"owner{i % 50}@example.com", "Maintained by the platform team " * 3, "2024-01-01",
+        ])
+    workbook.save(path)
+
+
+def read_all(source_cls, path):
+    source = source_cls(path)
+    try:
+        return [source.read(name) for name in source.sheet_names]
+    finally:
+        source.close()
+
+
+def measure(source_cls, path):
+    """Return (seconds, peak MiB, rows) of reading every sheet with `source_cls`."""
+    gc.collect()
+    start = time.perf_counter()
+    sheets = read_all(source_cls, path)
+    elapsed = time.perf_counter() - start
+    del sheets
+
+    # Separate run: tracemalloc slows the parse down several times
+    gc.collect()
+    tracemalloc.start()
+    sheets = read_all(source_cls, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, sum(len(rows) for rows in sheets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'reader':>8} {'seconds':>9} {'peak MiB':>9} {'file MiB':>9}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "links.xlsx")
+            make_workbook(path, rows)
+            size = os.path.getsize(path) / 2**20
+            for label, source_cls in (("pandas", _ExcelSource), ("stream", _StreamingExcelSource)):
+                elapsed, peak, count = measure(source_cls, path)
+                assert count == rows
+                print(f"{rows:>8} {label:>8} {elapsed:>9.2f} {peak:>9.1f} {size:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_login.py
+"""
+Login throughput and latency under concurrent load, for several sizes of
+the password verification pool. Requests rejected with 503 (queue full)
+are counted separately.
+
+    python benchmarks/bench_login.py --clients 16 --logins 20 --workers 1 2 4 --queue 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+
+def run(app, clients, logins):
+    """Each client thread posts `logins` logins; returns (latencies, rejected, seconds)."""
+    latencies, rejected = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def client():
+        c = app.test_client()
+        mine, busy = [], 0
+        barrier.wait()
+        for _ in range(logins):
+            start = time.perf_counter()
+            r = c.post("/login", data={"email": "roc@example.com", "password": "password123"})
+            if r.status_code == 503:
+                busy += 1
+            else:
+                mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+            rejected.append(busy)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, sum(rejected), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=20, help="Logins per client.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--queue", type=int, default=8, help="Waiting checks allowed per pool.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        os.environ.update(AUTO_INIT_DB="1", LINKS_WATCH_INTERVAL="0", RATELIMIT_STORAGE_URI="memory://")
+        os.chdir(ROOT)
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app import create_app  # noqa: E402  (builds the seeded database)
+
+        print(f"{args.clients} clients x {args.logins} logins, queue {args.queue}")
+        print(f"{'workers':>8} {'logins/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'rejected':>9}")
+        for workers in sorted(set(args.workers)):
+            app = create_app({
+                "AUTO_INIT_DB": False,
+                "RATELIMIT_ENABLED": False,
+                "LOGIN_VERIFY_WORKERS": workers,
+                "LOGIN_VERIFY_QUEUE": args.queue,
+            })
+            app.logger.disabled = True
+            latencies, rejected, seconds = run(app, args.clients, args.logins)
+            print(
+                f"{workers:>8} {len(latencies) / seconds:>9.1f} "
+                f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f} "
+                f"{rejected:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_ratelimit.py
+"""
+Per-request overhead of Flask-Limiter with the in-process memory store
+and the shared SQLite store (ratelimit.SQLiteStorage).
+
+    python benchmarks/bench_ratelimit.py --requests 5000
+    python benchmarks/bench_ratelimit.py --storage redis://localhost:6379
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ratelimit  # noqa: E402,F401  registers sqlite://
+
+
+def make_app(storage_uri):
+    app = Flask(__name__)
+
+    @app.route("/")
+    def home():
+        return "ok"
+
+    if storage_uri:
+        limiter = Limiter(
+            key_func=get_remote_address,
+            app=app,
+            default_limits=["1000000 per hour"],
+            storage_uri=storage_uri,
+            strategy="sliding-window-counter",
+        )
+        app.view_functions["home"] = limiter.limit("1000000 per minute")(app.view_functions["home"])
+    return app
+
+
+def per_request_us(app, n):
+    client = app.test_client()
+    client.get("/")
+    start = time.perf_counter()
+    for i in range(n):
+        # Spread hits over many client IPs to exercise key growth
+        client.get("/", environ_base={"REMOTE_ADDR": f"10.0.{i % 250}.{i % 200}"})
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--storage", nargs="*", default=[], help="extra storage URIs to compare")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storages = [
+            ("none", None),
+            ("memory", "memory://"),
+            ("sqlite", f"sqlite:///{os.path.join(tmp, 'ratelimit.db')}"),
+        ] + [(uri.split(":", 1)[0], uri) for uri in args.storage]
+
+        baseline = None
+        print(f"{'storage':>8} {'us/request':>11} {'overhead us':>12}")
+        for name, uri in storages:
+            us = per_request_us(make_app(uri), args.requests)
+            baseline = us if baseline is None else baseline
+            print(f"{name:>8} {us:>11.1f} {us - baseline:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
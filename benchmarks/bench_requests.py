@@ -0,0 +1,233 @@
+# benchmarks/bench_requests.py
+"""
+Replay a request trace against the real Flask app (SQLite database,
+synthetic workbooks of increasing size) and report, per route, the
+request count, throughput, p50/p95/p99 latency and peak RSS.
+
+Trace format: one JSON object per line,
+    {"method": "GET", "path": "/team/roc", "user": "roc@example.com"}
+    {"method": "POST", "path": "/login", "form": {"email": "...", "password": "..."}}
+`user` (optional) replays the request from a client logged in as that
+seeded user (password "password123"); `route` (optional) overrides the
+label used in the report, which defaults to the matched endpoint.
+
+    python benchmarks/bench_requests.py --sizes 100 1000 10000
+    python benchmarks/bench_requests.py --trace benchmarks/traces/sample.jsonl --concurrency 4
+    python benchmarks/bench_requests.py --make-trace 500 > my_trace.jsonl
+    python benchmarks/bench_requests.py --save base.json          # on main
+    python benchmarks/bench_requests.py --baseline base.json      # on a branch; exit 1 on regression
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_snapshot import make_workbook  # noqa: E402
+
+SEED_PASSWORD = "password123"
+SHEETS = ("scipher", "roc", "admin", "sales")
+
+
+# -----------------
+# Traces
+# -----------------
+def make_trace(count, seed=42):
+    """Synthetic mix: 40% home, 30% team pages, 10% logins, 20% 404s."""
+    rng = random.Random(seed)
+    trace = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.4:
+            trace.append({"method": "GET", "path": "/", "user": rng.choice([None, "roc@example.com"])})
+        elif roll < 0.7:
+            trace.append({"method": "GET", "path": "/team/roc", "user": "roc@example.com"})
+        elif roll < 0.8:
+            trace.append({
+                "method": "POST", "path": "/login",
+                "form": {"email": "roc@example.com", "password": SEED_PASSWORD},
+            })
+        else:
+            trace.append({"method": "GET", "path": f"/missing/{i}"})
+    return trace
+
+
+def read_trace(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+# -----------------
+# Measurement
+# -----------------
+def current_rss_mib():
+    """Resident set size of this process right now (Linux), else the peak so far."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+
+def route_label(app, entry):
+    if entry.get("route"):
+        return entry["route"]
+    adapter = app.url_map.bind("localhost")
+    try:
+        endpoint, _ = adapter.match(entry["path"].split("?")[0], method=entry.get("method", "GET"))
+    except Exception:
+        return "404"
+    return endpoint
+
+
+def login(client, email):
+    client.post("/login", data={"email": email, "password": SEED_PASSWORD})
+    return client
+
+
+def replay(app, trace, concurrency):
+    """Replay `trace` over `concurrency` threads. Returns {route: [latencies]}, {route: peak RSS}, seconds."""
+    labels = [route_label(app, entry) for entry in trace]
+    latencies, peaks = {}, {}
+    lock = threading.Lock()
+
+    def worker(offset):
+        clients = {}
+        mine = []
+        for i in range(offset, len(trace), concurrency):
+            entry = trace[i]
+            user = entry.get("user")
+            client = clients.get(user)
+            if client is None:
+                client = clients[user] = app.test_client()
+                if user:
+                    login(client, user)
+
+            start = time.perf_counter()
+            client.open(
+                entry["path"], method=entry.get("method", "GET"), data=entry.get("form"),
+                headers={"Accept-Encoding": "gzip, br"},
+            )
+            mine.append((labels[i], time.perf_counter() - start, current_rss_mib()))
+
+        with lock:
+            for label, seconds, rss in mine:
+                latencies.setdefault(label, []).append(seconds)
+                peaks[label] = max(peaks.get(label, 0.0), rss)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, peaks, time.perf_counter() - start
+
+
+def summarize(latencies, peaks, seconds):
+    summary = {}
+    for route, values in sorted(latencies.items()):
+        values.sort()
+        summary[route] = {
+            "count": len(values),
+            "rps": len(values) / seconds,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "peak_rss_mib": peaks[route],
+        }
+    return summary
+
+
+def compare(results, baseline, tolerance):
+    """Return the (size, route, baseline p99, p99) rows that regressed by more than `tolerance`."""
+    regressions = []
+    for size, routes in results.items():
+        for route, row in routes.items():
+            base = baseline.get(size, {}).get(route)
+            if base and row["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+                regressions.append((size, route, base["p99_ms"], row["p99_ms"]))
+    return regressions
+
+
+# -----------------
+# Main
+# -----------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Workbook rows (spread over the team sheets).")
+    parser.add_argument("--trace", help="JSONL trace to replay (default: a synthetic mix).")
+    parser.add_argument("--requests", type=int, default=300, help="Size of the synthetic trace.")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--make-trace", type=int, metavar="N", help="Print a synthetic trace of N requests and exit.")
+    parser.add_argument("--save", help="Write the results as JSON.")
+    parser.add_argument("--baseline", help="Compare p99 against results saved with --save.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p99 slowdown vs the baseline.")
+    args = parser.parse_args()
+
+    if args.make_trace:
+        for entry in make_trace(args.make_trace):
+            print(json.dumps(entry))
+        return 0
+
+    trace = read_trace(args.trace) if args.trace else make_trace(args.requests)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        os.environ.update(
+            AUTO_INIT_DB="1", LINKS_WATCH_INTERVAL="0", RATELIMIT_STORAGE_URI="memory://",
+            LINKS_FILE=os.path.join(tmp, "missing.xlsx"),
+        )
+        os.chdir(ROOT)
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app import create_app  # noqa: E402  (seeds the database)
+
+        print(f"{len(trace)} requests, concurrency {args.concurrency}")
+        for size in args.sizes:
+            path = os.path.join(tmp, f"links_{size}.xlsx")
+            make_workbook(path, size, sheets=SHEETS)
+            app = create_app({"AUTO_INIT_DB": False, "RATELIMIT_ENABLED": False, "LINKS_FILE": path})
+            app.logger.disabled = True
+
+            latencies, peaks, seconds = replay(app, trace, args.concurrency)
+            summary = results[str(size)] = summarize(latencies, peaks, seconds)
+
+            print(f"\nworkbook rows: {size}, {len(trace) / seconds:.1f} req/s overall")
+            print(f"{'route':>12} {'count':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS MiB':>8}")
+            for route, row in summary.items():
+                print(
+                    f"{route:>12} {row['count']:>6} {row['rps']:>8.1f} {row['p50_ms']:>8.2f} "
+                    f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['peak_rss_mib']:>8.1f}"
+                )
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for size, route, before, after in regressions:
+            print(f"[REGRESSION] {route} @ {size} rows: p99 {before:.2f} ms -> {after:.2f} ms")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# benchmarks/bench_search.py
+"""
+Build time and query latency of the /search inverted index.
+
+    python benchmarks/bench_search.py --links 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import Link, LinkIndex  # noqa: E402
+from search import SearchIndex  # noqa: E402
+
+WORDS = [
+    "grafana", "kibana", "jenkins", "jira", "confluence", "vault", "sentry", "airflow",
+    "dashboard", "pipeline", "billing", "inventory", "reports", "deploy", "staging",
+    "production", "metrics", "alerts", "runbook", "oncall", "payroll", "tickets",
+]
+
+
+def make_index(links, teams):
+    """Synthetic LinkIndex with `links` links spread over `teams` sheets."""
+    rng = random.Random(42)
+    per_team = links // teams
+    sheets = {}
+    for t in range(teams):
+        team = f"team{t}"
+        sheets[team] = tuple(
+            Link(
+                Title=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+                href=f"https://{team}.example.com/{rng.choice(WORDS)}/{i}",
+                target="_blank",
+                Icon="fa-link",
+                Team=team,
+                URL=f"https://{team}.example.com/{rng.choice(WORDS)}/{i}",
+            )
+            for i in range(per_team)
+        )
+    return LinkIndex((0, links), sheets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--links", type=int, default=100000)
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    link_index = make_index(args.links, args.teams)
+    start = time.perf_counter()
+    index = SearchIndex(link_index)
+    print(f"Indexed {len(index)} links, {len(index.tokens)} tokens in "
+          f"{time.perf_counter() - start:.2f}s")
+
+    user_teams = {"team0", "team1", "team2"}
+    queries = {
+        "exact": "grafana",
+        "prefix": "graf",
+        "two terms": "jenkins deploy",
+        "typo": "confluense",
+        "number": "4242",
+        "no match": "zzzzzz",
+    }
+
+    print(f"{'query':>12} {'results':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, query in queries.items():
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            results = index.search(query, user_teams)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(f"{label:>12} {len(results):>8} {statistics.median(timings):>8.3f} {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_snapshot.py
+"""
+Cold vs warm load times of the XLSX and snapshot paths of load_excel.
+
+    python benchmarks/bench_snapshot.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import WorkbookCache, compile_snapshot, snapshot_path  # noqa: E402
+
+
+def make_workbook(path, rows, sheets=("scipher", "roc")):
+    """Write a synthetic link workbook with `rows` rows spread over `sheets`."""
+    per_sheet = max(1, rows // len(sheets))
+    with pd.ExcelWriter(path) as writer:
+        for sheet in sheets:
+            pd.DataFrame({
+                "Team / Title": [f"{sheet} tool {i}" for i in range(per_sheet)],
+                "URL": [f"https://{sheet}.example.com/tools/{i}" for i in range(per_sheet)],
+                "Icon": ["fa-link"] * per_sheet,
+            }).to_excel(writer, sheet_name=sheet, index=False)
+
+
+def time_load(path, warm_runs=5):
+    """Return (cold seconds, best warm seconds) for a fresh cache."""
+    cache = WorkbookCache()
+    start = time.perf_counter()
+    cache.get_sheets(path)
+    cold = time.perf_counter() - start
+
+    warm = float("inf")
+    for _ in range(warm_runs):
+        start = time.perf_counter()
+        cache.get_sheets(path)
+        warm = min(warm, time.perf_counter() - start)
+    return cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'path':>9} {'cold ms':>10} {'warm ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            path = os.path.join(tmp, f"links_{rows}.xlsx")
+            make_workbook(path, rows)
+
+            xlsx_cold, xlsx_warm = time_load(path)
+
+            compile_snapshot(path)
+            snap_cold, snap_warm = time_load(path)
+            os.remove(snapshot_path(path))
+
+            print(f"{rows:>8} {'xlsx':>9} {xlsx_cold * 1000:>10.1f} {xlsx_warm * 1000:>10.3f}")
+            print(f"{rows:>8} {'snapshot':>9} {snap_cold * 1000:>10.1f} {snap_warm * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
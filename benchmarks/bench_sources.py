@@ -0,0 +1,64 @@
+# benchmarks/bench_sources.py
+"""
+Load time of a directory of link files versus file count and thread-pool size.
+
+    python benchmarks/bench_sources.py --files 1 4 16 --workers 1 2 4 8 --rows 2000
+    python benchmarks/bench_sources.py --snapshots   # compile snapshots first
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import compile_snapshot, link_source_files, load_link_sheets, workbook_cache  # noqa: E402
+
+
+def make_sources(directory, files, rows):
+    """Write `files` per-team link files (alternating XLSX and CSV) of `rows` rows each."""
+    for i in range(files):
+        df = pd.DataFrame({
+            "Link Title": [f"team{i} tool {r}" for r in range(rows)],
+            "URL": [f"https://team{i}.example.com/tools/{r}" for r in range(rows)],
+            "Icon": ["fa-link"] * rows,
+        })
+        if i % 2:
+            df.to_csv(os.path.join(directory, f"team{i}_links.csv"), index=False)
+        else:
+            df.to_excel(os.path.join(directory, f"team{i}_links.xlsx"), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--snapshots", action="store_true", help="Compile XLSX snapshots before timing.")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.rows} rows per file")
+    print(f"{'files':>6} {'workers':>8} {'seconds':>9} {'rows/s':>10}")
+    for files in args.files:
+        with tempfile.TemporaryDirectory() as tmp:
+            make_sources(tmp, files, args.rows)
+            paths = link_source_files(tmp)
+            if args.snapshots:
+                for path in paths:
+                    if not path.endswith(".csv"):
+                        compile_snapshot(path)
+
+            for workers in sorted(set(args.workers)):
+                workbook_cache.clear()
+                start = time.perf_counter()
+                sheets = load_link_sheets(paths, workers=workers)
+                elapsed = time.perf_counter() - start
+                total = sum(len(rows) for rows in sheets.values())
+                print(f"{files:>6} {workers:>8} {elapsed:>9.3f} {total / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_startup.py
+"""
+Worker startup time, from `import app` to the first request served.
+- init-on-boot: AUTO_INIT_DB=1, every worker creates/heals the schema and
+  seeds users (what importing app.py used to do).
+- schema-check: the default; one schema-version query per worker.
+
+    python benchmarks/bench_startup.py --runs 5
+    DATABASE_URL=postgresql://... python benchmarks/bench_startup.py
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import time
+start = time.perf_counter()
+import app
+app.app.test_client().get("/login")
+print(time.perf_counter() - start)
+"""
+
+
+def run_child(env):
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=ROOT, env=env,
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+
+        # Initialize once so both modes start from a ready database
+        subprocess.run([sys.executable, "seed.py"], cwd=ROOT, env=env,
+                       check=True, capture_output=True)
+
+        print(f"{'mode':>14} {'median ms':>10} {'min ms':>8}")
+        for mode, auto_init in (("init-on-boot", "1"), ("schema-check", "0")):
+            times = [run_child({**env, "AUTO_INIT_DB": auto_init}) for _ in range(args.runs)]
+            print(f"{mode:>14} {statistics.median(times) * 1000:>10.1f} {min(times) * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/bench_workers.py
+"""
+Per-worker unique memory (USS: Private_Clean + Private_Dirty from
+/proc/<pid>/smaps_rollup) of a gunicorn deployment serving a synthetic
+workbook, after every worker has served each page a few times.
+- on-demand: plain `gunicorn app:app`; each worker parses the workbook
+  and builds its own link index on its first requests.
+- preload: `gunicorn -c gunicorn.conf.py app:app`; the master builds and
+  freezes the index once (warmup.py) and the workers share it.
+
+Linux only; needs gunicorn.
+
+    python benchmarks/bench_workers.py --rows 50000 --workers 4
+"""
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_snapshot import make_workbook  # noqa: E402
+
+SHEETS = ("scipher", "roc", "admin", "sales")
+MODES = {
+    "on-demand": ["-c", os.devnull],   # skip ./gunicorn.conf.py, which gunicorn reads by default
+    "preload": ["-c", os.path.join(ROOT, "gunicorn.conf.py")],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def uss_mib(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return (fields["Private_Clean"] + fields["Private_Dirty"]) / 1024, fields["Rss"] / 1024
+
+
+def worker_pids(master):
+    with open(f"/proc/{master}/task/{master}/children") as fh:
+        return [int(pid) for pid in fh.read().split()]
+
+
+def wait_ready(base, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(base + "/login", timeout=30)
+            return
+        except (requests.ConnectionError, requests.Timeout):
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not start")
+
+
+def exercise(base, workers, rounds):
+    """Log in and hit every page enough times that each worker serves them all."""
+    session = requests.Session()
+    session.post(base + "/login", data={"email": "roc@example.com", "password": "password123"})
+    first = None
+    for _ in range(rounds * workers):
+        for path in ("/", "/team/roc", "/api/teams/roc/links", "/search?q=tool"):
+            # New connections so the kernel spreads them over the workers
+            response = requests.get(base + path, cookies=session.cookies, headers={"Connection": "close"})
+            if first is None:
+                first = response.elapsed.total_seconds()
+    return first
+
+
+def run_mode(mode, env, workers, rounds):
+    port = free_port()
+    command = [sys.executable, "-m", "gunicorn", *MODES[mode],
+               "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "app:app"]
+    master = subprocess.Popen(command, cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        start = time.perf_counter()
+        wait_ready(base)
+        ready = time.perf_counter() - start
+        first = exercise(base, workers, rounds)
+        time.sleep(0.5)
+        pids = worker_pids(master.pid)
+        usage = [uss_mib(pid) for pid in pids]
+        return {
+            "workers": len(pids),
+            "uss": statistics.mean(u for u, _ in usage),
+            "rss": statistics.mean(r for _, r in usage),
+            "master_rss": uss_mib(master.pid)[1],
+            "ready": ready,
+            "first_ms": first * 1000,
+        }
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000, help="Workbook rows (spread over the team sheets).")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5, help="Requests per page per worker.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workbook = os.path.join(tmp, "links.xlsx")
+        make_workbook(workbook, args.rows, SHEETS)
+        env = dict(os.environ)
+        env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        env.update(LINKS_FILE=workbook, RATELIMIT_STORAGE_URI="memory://")
+        subprocess.run([sys.executable, "seed.py"], cwd=ROOT, env=env, check=True, capture_output=True)
+
+        print(f"{args.rows} links, {args.workers} workers")
+        print(f"{'mode':>10} {'USS/worker MiB':>15} {'RSS/worker MiB':>15} {'master RSS MiB':>15} "
+              f"{'ready s':>8} {'1st req ms':>11}")
+        for mode in MODES:
+            row = run_mode(mode, env, args.workers, args.rounds)
+            print(f"{mode:>10} {row['uss']:>15.1f} {row['rss']:>15.1f} {row['master_rss']:>15.1f} "
+                  f"{row['ready']:>8.2f} {row['first_ms']:>11.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# compression.py
+import gzip
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:   # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE = frozenset({
+    "text/html", "text/plain", "text/css", "text/javascript", "application/json",
+})
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5   # 11 is far too slow for per-response use
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressedCache:
+    """
+    LRU of compressed bodies keyed by (endpoint, ETag, encoding). Page ETags
+    already cover the route, team and content version (workbook, health
+    results, templates), so a key never maps to stale output.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compress(self, key, body, encoding):
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+
+        compressed = compress(body, encoding)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+def negotiate_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def register_compression(app):
+    """
+    Compress text responses of at least COMPRESS_MIN_SIZE bytes with the
+    best encoding the client accepts (brotli if installed, else gzip).
+    Responses with an ETag are compressed once and then served from the
+    shared CompressedCache; streamed and already-encoded responses pass through.
+    """
+    app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+    app.config.setdefault("COMPRESS_CACHE_SIZE", 512)
+    cache = CompressedCache(app.config["COMPRESS_CACHE_SIZE"])
+    app.extensions["compressed_cache"] = cache
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.mimetype not in COMPRESSIBLE
+            or response.is_streamed
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.status_code in (204, 304)
+            or "no-transform" in response.headers.get("Cache-Control", "")
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        body = response.get_data()
+        encoding = negotiate_encoding()
+        if encoding is None or len(body) < app.config["COMPRESS_MIN_SIZE"]:
+            return response
+
+        etag, _ = response.get_etag()
+        if etag:
+            compressed = cache.get_or_compress((request.endpoint, etag, encoding), body, encoding)
+            # Encodings differ byte-wise, so the validator becomes weak
+            response.set_etag(etag, weak=True)
+        else:
+            compressed = compress(body, encoding)
+
+        response.set_data(compressed)
+        response.content_encoding = encoding
+        return response
+
+    return cache
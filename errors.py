@@ -1,116 +1,261 @@
-# errors.py
-from werkzeug.exceptions import HTTPException
-import logging
-from logging.handlers import RotatingFileHandler
-import re
-from flask import render_template, request, jsonify
-
-
-class InvalidCredentialsError(Exception):
-    """Raised when user login credentials are invalid."""
-    pass
-
-
-# ✅ Define a custom HTTPException subclass for 498
-class CORSViolationError(HTTPException):
-    code = 498
-    description = "CORS policy violation"
-
-
-def register_error_handlers(app):
-    """Attach custom error handlers and logging to the Flask app."""
-
-    # -----------------
-    # Logging setup
-    # -----------------
-    if not app.debug:
-        file_handler = RotatingFileHandler(
-            'error_log.log',
-            maxBytes=10_000_000,
-            backupCount=5
-        )
-        file_handler.setLevel(logging.ERROR)
-        formatter = logging.Formatter(
-            '%(asctime)s [%(levelname)s] %(message)s [%(module)s:%(lineno)d]'
-        )
-        file_handler.setFormatter(formatter)
-        app.logger.addHandler(file_handler)
-
-    def log_err(level, code, msg):
-        app.logger.log(
-            level,
-            f"{code}: {msg} | Path={request.path} | IP={request.remote_addr} | Agent={request.user_agent}"
-        )
-
-    # -----------------
-    # Basic SQL injection pattern check
-    # -----------------
-    @app.before_request
-    def detect_sql_injection():
-        suspicious_patterns = re.compile(r"(\bUNION\b|\bSELECT\b|\bDROP\b|\bINSERT\b|\bUPDATE\b|\bDELETE\b|--|;)", re.IGNORECASE)
-        for param, value in {**request.args, **request.form}.items():
-            if suspicious_patterns.search(value):
-                log_err(logging.WARNING, "SQL-INJECTION", f"Param '{param}' with value '{value}'")
-                return render_template('errors/400.html', error="Invalid request syntax"), 400
-
-    # -----------------
-    # Standard HTTP Errors
-    # -----------------
-    @app.errorhandler(400)
-    def bad_request(error):
-        log_err(logging.ERROR, 400, error)
-        return render_template('errors/400.html', error=error), 400
-
-    @app.errorhandler(401)
-    def unauthorized(error):
-        log_err(logging.ERROR, 401, error)
-        return render_template('errors/401.html', error=error), 401
-
-    @app.errorhandler(403)
-    def forbidden(error):
-        log_err(logging.ERROR, 403, error)
-        return render_template('errors/403.html', error=error), 403
-
-    @app.errorhandler(404)
-    def page_not_found(error):
-        log_err(logging.ERROR, 404, error)
-        return render_template('errors/404.html', error=error), 404
-
-    @app.errorhandler(405)
-    def method_not_allowed(error):
-        log_err(logging.ERROR, 405, error)
-        return render_template('errors/405.html', error=error), 405
-
-    @app.errorhandler(413)
-    def payload_too_large(error):
-        log_err(logging.ERROR, 413, error)
-        return render_template('errors/413.html', error=error), 413
-
-    @app.errorhandler(500)
-    def internal_server_error(error):
-        log_err(logging.ERROR, 500, error)
-        return render_template('errors/500.html', error=error), 500
-
-    # -----------------
-    # ✅ Custom 498 CORS Error
-    # -----------------
-    @app.errorhandler(CORSViolationError)
-    def cors_error(error):
-        log_err(logging.WARNING, 498, f"CORS policy violation: {error}")
-        return jsonify({"error": error.description}), 498
-
-    # -----------------
-    # Invalid credentials handler
-    # -----------------
-    @app.errorhandler(InvalidCredentialsError)
-    def handle_invalid_login(error):
-        log_err(logging.WARNING, "LOGIN", f"Invalid credentials attempt: {error}")
-        return render_template('errors/401.html', error="Invalid username or password"), 401
-
-    # -----------------
-    # Catch-all exception
-    # -----------------
-    @app.errorhandler(Exception)
-    def handle_unexpected_exception(error):
-        log_err(logging.ERROR, "EXCEPTION", error)
-        return render_template('errors/500.html', error=error), 500
+# errors.py
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import HTTP_STATUS_CODES
+from jinja2 import TemplateNotFound
+import logging
+from logpipe import register_log_pipeline
+import re
+from itertools import islice
+import hashlib
+from flask import render_template, request, jsonify, current_app, make_response
+from metrics import timed
+
+
+class InvalidCredentialsError(Exception):
+    """Raised when user login credentials are invalid."""
+    pass
+
+
+class LoginBusyError(Exception):
+    """Raised when the password verification queue is full."""
+    pass
+
+
+# ✅ Define a custom HTTPException subclass for 498
+class CORSViolationError(HTTPException):
+    code = 498
+    description = "CORS policy violation"
+
+
+# -----------------
+# Request inspection (basic SQL injection filter)
+# -----------------
+DEFAULT_SQLI_RULES = {
+    "sql-keyword": r"\b(?:UNION|SELECT|DROP|INSERT|UPDATE|DELETE)\b",
+    "sql-comment": r"--",
+    "statement-separator": r";",
+}
+
+# Rule names reported for requests too large to scan in full (rejected with 413)
+TOO_MANY_VALUES = "too-many-values"
+VALUE_TOO_LONG = "value-too-long"
+OVERSIZE_RULES = frozenset({TOO_MANY_VALUES, VALUE_TOO_LONG})
+
+# Endpoints that never carry user input worth scanning
+DEFAULT_SQLI_ALLOWLIST = frozenset({"static", "asset"})
+
+FORM_MIMETYPES = frozenset({"application/x-www-form-urlencoded", "multipart/form-data"})
+
+
+class RequestInspector:
+    """
+    Scans query and form values against a rule set compiled once into a
+    single regex. The values are joined by NUL so the whole request is
+    checked with one regex search. A request with more than `max_values`
+    values, or a value longer than `max_value_length` characters, is
+    flagged as oversized instead of being partly scanned.
+    """
+
+    def __init__(self, rules=None, max_values=256, max_value_length=4096):
+        rules = rules or DEFAULT_SQLI_RULES
+        # Each rule is one numbered group; rules may contain groups of their own
+        self.rule_groups = {}
+        parts = []
+        group = 1
+        for name, regex in rules.items():
+            self.rule_groups[group] = name
+            parts.append(f"({regex})")
+            group += 1 + re.compile(regex).groups
+        self.pattern = re.compile("|".join(parts), re.IGNORECASE)
+        self.max_values = max_values
+        self.max_value_length = max_value_length
+
+    def iter_values(self, req):
+        """Yield (param, value) pairs; the form is only parsed for form posts."""
+        for param, values in req.args.lists():
+            for value in values:
+                yield param, value
+
+        if req.method in ("POST", "PUT", "PATCH", "DELETE") and req.mimetype in FORM_MIMETYPES:
+            for param, values in req.form.lists():
+                for value in values:
+                    yield param, value
+
+    def inspect(self, req):
+        """Return (param, value, rule name) of the first suspicious value, or None."""
+        pairs = list(islice(self.iter_values(req), self.max_values + 1))
+        if not pairs:
+            return None
+        if len(pairs) > self.max_values:
+            param, value = pairs[-1]
+            return param, value, TOO_MANY_VALUES
+        for param, value in pairs:
+            if len(value) > self.max_value_length:
+                return param, value, VALUE_TOO_LONG
+
+        match = self.pattern.search("\0".join(value for _, value in pairs))
+        if not match:
+            return None
+        rule = next(name for group, name in self.rule_groups.items() if match.start(group) != -1)
+
+        # Map the match offset back to the value it came from
+        offset = match.start()
+        for param, value in pairs:
+            if offset <= len(value):
+                return param, value, rule
+            offset -= len(value) + 1
+        return None
+
+
+default_inspector = RequestInspector()
+
+
+# -----------------
+# Cached error pages
+# -----------------
+def render_error_page(code):
+    """
+    Render the static errors/<code>.html template, or a plain page when the
+    app has no such template. Returns (html bytes, etag).
+    """
+    try:
+        html = render_template(f"errors/{code}.html")
+    except TemplateNotFound:
+        html = f"<!DOCTYPE html><title>{code}</title><h1>{code} {HTTP_STATUS_CODES.get(code, 'Error')}</h1>"
+    html = html.encode("utf-8")
+    return html, hashlib.sha1(html).hexdigest()[:16]
+
+
+def error_page(code):
+    """Response for error page `code`, rendered on first use and then served from memory."""
+    pages = current_app.extensions.setdefault("error_pages", {})
+    page = pages.get(code)
+    if page is None:
+        page = pages[code] = render_error_page(code)
+    html, etag = page
+    response = make_response(html, code)
+    response.set_etag(etag)   # lets the compression cache reuse the compressed body
+    return response
+
+
+def register_error_handlers(app):
+    """Attach custom error handlers and logging to the Flask app."""
+
+    # -----------------
+    # Logging setup
+    # -----------------
+    # Batched JSON lines written off the request thread (see logpipe.py)
+    if not app.debug:
+        register_log_pipeline(app.logger, 'error_log.log', level=logging.ERROR)
+
+    def log_err(level, code, msg):
+        app.logger.log(
+            level,
+            f"{code}: {msg}",
+            extra={
+                "code": code,
+                "path": request.path,
+                "ip": request.remote_addr,
+                "agent": str(request.user_agent),
+            },
+        )
+
+    # -----------------
+    # Basic SQL injection pattern check
+    # Config: SQLI_ENABLED, SQLI_RULES ({name: regex}), SQLI_ALLOWLIST
+    # (endpoint names), SQLI_MAX_VALUES, SQLI_MAX_VALUE_LENGTH
+    # -----------------
+    if "SQLI_RULES" in app.config or "SQLI_MAX_VALUES" in app.config or "SQLI_MAX_VALUE_LENGTH" in app.config:
+        inspector = RequestInspector(
+            rules=app.config.get("SQLI_RULES"),
+            max_values=app.config.get("SQLI_MAX_VALUES", 256),
+            max_value_length=app.config.get("SQLI_MAX_VALUE_LENGTH", 4096),
+        )
+    else:
+        inspector = default_inspector
+    allowlist = frozenset(app.config.get("SQLI_ALLOWLIST", DEFAULT_SQLI_ALLOWLIST))
+
+    @app.before_request
+    def detect_sql_injection():
+        if not app.config.get("SQLI_ENABLED", True) or request.endpoint in allowlist:
+            return None
+        with timed("sqli"):
+            hit = inspector.inspect(request._get_current_object())
+        if hit:
+            param, value, rule = hit
+            if rule in OVERSIZE_RULES:
+                log_err(logging.WARNING, "SQL-INJECTION", f"Rejected unscanned input at param '{param}' ({rule})")
+                return error_page(413)
+            log_err(logging.WARNING, "SQL-INJECTION", f"Param '{param}' with value '{value}' (rule {rule})")
+            return error_page(400)
+
+    # -----------------
+    # Standard HTTP Errors
+    # -----------------
+    @app.errorhandler(400)
+    def bad_request(error):
+        log_err(logging.ERROR, 400, error)
+        return error_page(400)
+
+    @app.errorhandler(401)
+    def unauthorized(error):
+        log_err(logging.ERROR, 401, error)
+        return error_page(401)
+
+    @app.errorhandler(403)
+    def forbidden(error):
+        log_err(logging.ERROR, 403, error)
+        return error_page(403)
+
+    @app.errorhandler(404)
+    def page_not_found(error):
+        log_err(logging.ERROR, 404, error)
+        return error_page(404)
+
+    @app.errorhandler(405)
+    def method_not_allowed(error):
+        log_err(logging.ERROR, 405, error)
+        return error_page(405)
+
+    @app.errorhandler(413)
+    def payload_too_large(error):
+        log_err(logging.ERROR, 413, error)
+        return error_page(413)
+
+    @app.errorhandler(500)
+    def internal_server_error(error):
+        log_err(logging.ERROR, 500, error)
+        return error_page(500)
+
+    # -----------------
+    # ✅ Custom 498 CORS Error
+    # -----------------
+    @app.errorhandler(CORSViolationError)
+    def cors_error(error):
+        log_err(logging.WARNING, 498, f"CORS policy violation: {error}")
+        return jsonify({"error": error.description}), 498
+
+    # -----------------
+    # Invalid credentials handler
+    # -----------------
+    @app.errorhandler(InvalidCredentialsError)
+    def handle_invalid_login(error):
+        log_err(logging.WARNING, "LOGIN", f"Invalid credentials attempt: {error}")
+        return error_page(401)
+
+    # -----------------
+    # Login queue full: shed load instead of tying up workers
+    # -----------------
+    @app.errorhandler(LoginBusyError)
+    def handle_login_busy(error):
+        log_err(logging.WARNING, "LOGIN", f"Rejected, {error}")
+        message = "Too many sign-ins right now, please try again in a moment."
+        return render_template('errors/503.html', message=message), 503, {"Retry-After": "1"}
+
+    # -----------------
+    # Catch-all exception
+    # -----------------
+    @app.errorhandler(Exception)
+    def handle_unexpected_exception(error):
+        log_err(logging.ERROR, "EXCEPTION", error)
+        return error_page(500)
@@ -0,0 +1,29 @@
+# gunicorn.conf.py
+"""
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is imported and its link index built once in the master
+(see warmup.py); workers are forked from it and share those pages.
+
+Each worker serves GUNICORN_THREADS requests at once (gthread), so logins
+waiting on a password check don't block the worker, and the login
+verification queue (LOGIN_VERIFY_WORKERS / LOGIN_VERIFY_QUEUE) can fill
+up and shed load with a 503.
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+preload_app = True
+
+
+def when_ready(server):
+    from warmup import warm_up
+    warm_up(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    from warmup import after_fork
+    after_fork(server.app.wsgi())
@@ -1,65 +1,556 @@
-#helpers.py
-import os
-import pandas as pd
-from flask import abort, url_for
-
-# -----------------
-# Helper functions
-# -----------------
-def load_excel(file_path, sheets=None):
-    """
-    Load links from an Excel workbook.
-    - If `sheets` is None: loads all sheets.
-    - If `sheets` is a list: loads only those sheets.
-    Returns: list of dicts with all link rows.
-    """
-    if not os.path.exists(file_path):
-        abort(404, description=f"File not found: {file_path}")
-
-    # Load workbook once
-    xls = pd.ExcelFile(file_path)
-    all_links = []
-
-    # Decide which sheets to load
-    if sheets is None:
-        sheets = xls.sheet_names
-
-    for sheet_name in sheets:
-        if sheet_name not in xls.sheet_names:
-            print(f"[WARN] Sheet '{sheet_name}' not found in workbook, skipping.")
-            continue
-
-        df = pd.read_excel(xls, sheet_name=sheet_name)
-        df = df.fillna('')
-        
-        # ✅ Ensure a Team column exists (fallback to sheet name)
-        if 'Team' not in df.columns:
-            df['Team'] = sheet_name
-        else:
-            df['Team'] = df['Team'].replace('', sheet_name)
-
-        all_links.extend(df.to_dict(orient='records'))
-
-    return all_links
-
-
-def prepare_links(links):
-    """
-    Add target and href logic for internal vs external links.
-    If the URL starts with http(s):// -> open externally.
-    Otherwise, treat it as an internal route.
-    """
-    for link in links:
-        url = link.get('URL', '').strip()
-
-        if url.startswith('http://') or url.startswith('https://'):
-            link['target'] = '_blank'   # external link
-            link['href'] = url
-        elif url:  # internal link
-            link['target'] = '_self'
-            link['href'] = url_for('team_page', team_name=url.strip('/'))
-        else:
-            link['target'] = '_self'
-            link['href'] = '#'
-
-    return links
+#helpers.py
+import os
+import pickle
+import tempfile
+import re
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+import pandas as pd
+from openpyxl import load_workbook
+from flask import abort, url_for, has_request_context, current_app
+from metrics import timed
+
+
+# -----------------
+# Workbook cache
+# -----------------
+class WorkbookCache:
+    """
+    In-process cache of parsed workbook sheets.
+    - Each sheet is parsed once and stored under (path, sheet).
+    - Entries are tagged with the file's (mtime, size) signature;
+      a different signature on disk triggers a reload.
+    - hits / misses / reloads are counted per sheet lookup.
+    - Sheets are read from the workbook's snapshot when it matches the
+      file on disk, and from the XLSX otherwise. A CSV file is a single
+      sheet named after the file (see file_team).
+    - Each path has its own lock, so different files parse concurrently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._path_locks = {}    # path -> Lock
+        self._sheets = {}        # (path, sheet) -> (signature, rows)
+        self._sheet_names = {}   # path -> (signature, sheet names)
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    @staticmethod
+    def signature(path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @timed("excel")
+    def get_sheets(self, file_path, sheets=None):
+        """
+        Return {sheet_name: rows} for the requested sheets (all if None).
+        Rows are tuples of dicts and must be treated as read-only.
+        """
+        path = os.path.abspath(file_path)
+        signature = self.signature(path)
+
+        with self._lock:
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+
+        with path_lock:
+            source = None
+            try:
+                cached_names = self._sheet_names.get(path)
+                if cached_names is None or cached_names[0] != signature:
+                    source = _open_source(path, signature)
+                    self._sheet_names[path] = (signature, list(source.sheet_names))
+                sheet_names = self._sheet_names[path][1]
+
+                if sheets is None:
+                    sheets = sheet_names
+
+                result = {}
+                for sheet_name in sheets:
+                    if sheet_name not in sheet_names:
+                        print(f"[WARN] Sheet '{sheet_name}' not found in workbook, skipping.")
+                        continue
+
+                    entry = self._sheets.get((path, sheet_name))
+                    with self._lock:
+                        if entry is not None and entry[0] == signature:
+                            self.hits += 1
+                        elif entry is None:
+                            self.misses += 1
+                        else:
+                            self.reloads += 1
+                    if entry is not None and entry[0] == signature:
+                        result[sheet_name] = entry[1]
+                        continue
+
+                    if source is None:
+                        source = _open_source(path, signature)
+                    rows = source.read(sheet_name)
+                    self._sheets[(path, sheet_name)] = (signature, rows)
+                    result[sheet_name] = rows
+
+                return result
+            finally:
+                if source is not None:
+                    source.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "entries": len(self._sheets),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._sheets.clear()
+            self._sheet_names.clear()
+            self.hits = self.misses = self.reloads = 0
+
+
+workbook_cache = WorkbookCache()
+
+
+# Columns compile_link reads; everything else in a sheet is never materialized
+LINK_COLUMNS = frozenset({"Link Title", "Team / Title", "Title", "URL", "Icon", "Team"})
+
+# "stream" (openpyxl read-only, projected columns) or "pandas" (DataFrame, all columns)
+WORKBOOK_READER = os.getenv("WORKBOOK_READER", "stream")
+
+
+class _ExcelSource:
+    """Reads sheets straight from the XLSX with pandas/openpyxl."""
+
+    def __init__(self, path):
+        self.xls = pd.ExcelFile(path)
+        self.sheet_names = self.xls.sheet_names
+
+    def read(self, sheet_name):
+        return _parse_sheet(self.xls, sheet_name)
+
+    def close(self):
+        self.xls.close()
+
+
+class _StreamingExcelSource:
+    """
+    Reads sheets row by row with openpyxl in read-only mode, without a
+    DataFrame. Only `columns` (all if None) are kept.
+    """
+
+    def __init__(self, path, columns=LINK_COLUMNS):
+        self.columns = columns
+        self.workbook = load_workbook(path, read_only=True, data_only=True)
+        self.sheet_names = self.workbook.sheetnames
+
+    def read(self, sheet_name):
+        return tuple(iter_sheet_rows(self.workbook[sheet_name], sheet_name, self.columns))
+
+    def close(self):
+        self.workbook.close()
+
+
+def iter_sheet_rows(worksheet, sheet_name, columns=None):
+    """
+    Yield one dict per non-empty row of `worksheet`, keyed by the header
+    row and limited to `columns`. Empty cells become '' and a missing or
+    empty Team falls back to the sheet name, as in _parse_sheet.
+    """
+    # One unbounded pass: bounded iter_rows makes openpyxl scan the sheet
+    # for its dimensions when the file doesn't record them
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+
+    wanted, seen = [], set()
+    for i, name in enumerate(header):
+        name = str(name).strip() if name is not None else ""
+        if name and (columns is None or name in columns) and name not in seen:
+            wanted.append((i, name))
+            seen.add(name)
+
+    for values in rows:
+        record = {}
+        empty = True
+        for i, name in wanted:
+            value = values[i] if i < len(values) else None
+            if value is None:
+                value = ''
+            else:
+                empty = False
+            record[name] = value
+        if empty:
+            continue
+        if not record.get('Team'):
+            record['Team'] = sheet_name
+        yield record
+
+
+class _SnapshotSource:
+    """Reads sheets from a compiled snapshot (see compile_snapshot)."""
+
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.sheet_names = list(sheets)
+
+    def read(self, sheet_name):
+        columns, rows = self.sheets[sheet_name]
+        return tuple(dict(zip(columns, row)) for row in rows)
+
+    def close(self):
+        pass
+
+
+class _CsvSource:
+    """Reads a CSV export as one sheet named after the file's team."""
+
+    def __init__(self, path):
+        self.path = path
+        self.sheet_names = [file_team(path)]
+
+    def read(self, sheet_name):
+        df = pd.read_csv(self.path).fillna('')
+        if 'Team' not in df.columns:
+            df['Team'] = sheet_name
+        else:
+            df['Team'] = df['Team'].replace('', sheet_name)
+        return tuple(df.to_dict(orient='records'))
+
+    def close(self):
+        pass
+
+
+def _open_source(path, signature):
+    if path.lower().endswith(".csv"):
+        return _CsvSource(path)
+    snapshot = read_snapshot(path, signature)
+    if snapshot is not None:
+        return _SnapshotSource(snapshot)
+    return _excel_source(path)
+
+
+def _excel_source(path):
+    if WORKBOOK_READER == "stream" and path.lower().endswith((".xlsx", ".xlsm")):
+        return _StreamingExcelSource(path)
+    return _ExcelSource(path)
+
+
+def _parse_sheet(xls, sheet_name):
+    """Parse one sheet into a tuple of row dicts."""
+    df = pd.read_excel(xls, sheet_name=sheet_name)
+    df = df.fillna('')
+
+    # ✅ Ensure a Team column exists (fallback to sheet name)
+    if 'Team' not in df.columns:
+        df['Team'] = sheet_name
+    else:
+        df['Team'] = df['Team'].replace('', sheet_name)
+
+    return tuple(df.to_dict(orient='records'))
+
+
+# -----------------
+# Workbook snapshots
+# -----------------
+SNAPSHOT_FORMAT = 1
+
+
+def snapshot_path(file_path):
+    """data/team_links.xlsx -> data/team_links.snapshot.pkl"""
+    return os.path.splitext(file_path)[0] + ".snapshot.pkl"
+
+
+def compile_snapshot(file_path):
+    """
+    Parse every sheet of `file_path` once and write a compact pickle
+    snapshot next to it. Each sheet is stored as (columns, row tuples)
+    together with the source's (mtime, size) signature.
+    Returns the snapshot path.
+    """
+    path = os.path.abspath(file_path)
+    signature = WorkbookCache.signature(path)
+    source = _excel_source(path)
+
+    sheets = {}
+    try:
+        for sheet_name in source.sheet_names:
+            rows = source.read(sheet_name)
+            columns = tuple(rows[0]) if rows else ()
+            sheets[sheet_name] = (columns, tuple(tuple(row.values()) for row in rows))
+    finally:
+        source.close()
+
+    target = snapshot_path(file_path)
+    payload = {"format": SNAPSHOT_FORMAT, "source": signature, "sheets": sheets}
+
+    # Write atomically so concurrent readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump(payload, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return target
+
+
+def read_snapshot(file_path, signature=None):
+    """
+    Return {sheet: (columns, rows)} from the snapshot of `file_path`,
+    or None when there is no snapshot or the XLSX changed since it was compiled.
+    """
+    target = snapshot_path(file_path)
+    if not os.path.exists(target):
+        return None
+
+    if signature is None:
+        signature = WorkbookCache.signature(file_path)
+
+    try:
+        with open(target, "rb") as fh:
+            payload = pickle.load(fh)
+    except Exception as e:
+        print(f"[WARN] Ignoring unreadable snapshot {target}: {e}")
+        return None
+
+    if payload.get("format") != SNAPSHOT_FORMAT or tuple(payload.get("source", ())) != signature:
+        return None
+    return payload["sheets"]
+
+
+def ensure_snapshot(file_path):
+    """Compile the snapshot of `file_path` if it is missing or stale."""
+    if not os.path.exists(file_path) or file_path.lower().endswith(".csv"):
+        return None
+    if read_snapshot(file_path) is None:
+        print(f"[SNAPSHOT] Compiling {file_path}...")
+        return compile_snapshot(file_path)
+    return snapshot_path(file_path)
+
+
+# -----------------
+# Helper functions
+# -----------------
+def load_excel(file_path, sheets=None):
+    """
+    Load links from an Excel workbook.
+    - If `sheets` is None: loads all sheets.
+    - If `sheets` is a list: loads only those sheets.
+    Sheets are served from `workbook_cache` until the file changes on disk.
+    Returns: list of dicts with all link rows.
+    """
+    if not os.path.exists(file_path):
+        abort(404, description=f"File not found: {file_path}")
+
+    all_links = []
+    for rows in workbook_cache.get_sheets(file_path, sheets).values():
+        # Copy rows so callers (prepare_links) can't mutate the cache
+        all_links.extend(dict(row) for row in rows)
+
+    return all_links
+
+
+def workbook_cache_stats():
+    """Return hit/miss/reload counters of the workbook cache."""
+    return workbook_cache.stats()
+
+
+@timed("links")
+def prepare_links(links):
+    """
+    Compile raw link rows into immutable `Link` records.
+    If the URL starts with http(s):// -> open externally.
+    Otherwise, treat it as an internal route.
+    The input rows are left untouched.
+    """
+    return tuple(compile_link(row) for row in links)
+
+
+# -----------------
+# Precompiled link index
+# -----------------
+Link = namedtuple("Link", ["Title", "href", "target", "Icon", "Team", "URL"])
+
+
+def compile_link(row):
+    """Resolve href, target, icon and title of one workbook row."""
+    url = str(row.get('URL', '')).strip()
+
+    if url.startswith('http://') or url.startswith('https://'):
+        target, href = '_blank', url   # external link
+    elif url:  # internal link
+        target, href = '_self', url_for('team_page', team_name=url.strip('/'))
+    else:
+        target, href = '_self', '#'
+
+    title = row.get('Link Title') or row.get('Team / Title') or row.get('Title') or ''
+    icon = row.get('Icon') or 'fa-link'
+
+    return Link(
+        Title=str(title),
+        href=href,
+        target=target,
+        # Icons and teams repeat on every row; share one string object each
+        Icon=sys.intern(str(icon)),
+        Team=sys.intern(str(row.get('Team', ''))),
+        URL=url,
+    )
+
+
+class LinkIndex:
+    """
+    Immutable per-team link index for one workbook version.
+    `teams` maps sheet name -> tuple of `Link` records;
+    `last_modified` is the source's mtime (unix seconds).
+    """
+    __slots__ = ("version", "teams", "last_modified")
+
+    def __init__(self, version, teams, last_modified=None):
+        self.version = version
+        self.teams = MappingProxyType(teams)
+        self.last_modified = last_modified
+
+    def links(self, team):
+        """Return the links of `team` (empty tuple if unknown)."""
+        return self.teams.get(team, ())
+
+
+_link_indexes = {}   # path -> LinkIndex
+_link_index_lock = threading.Lock()
+_watched_paths = set()   # paths kept fresh by a LinkIndexWatcher (see watcher.py)
+
+
+def build_link_index(sheets, version, last_modified=None):
+    """Compile {sheet: rows} into a LinkIndex outside of any request."""
+    if has_request_context():
+        teams = {name: prepare_links(rows) for name, rows in sheets.items()}
+    else:
+        # url_for needs a request context for internal links
+        with current_app.test_request_context():
+            teams = {name: prepare_links(rows) for name, rows in sheets.items()}
+    return LinkIndex(version, teams, last_modified)
+
+
+# -----------------
+# Link sources (one workbook, or a directory of workbooks / CSVs)
+# -----------------
+LINK_FILE_EXTENSIONS = (".xlsx", ".xls", ".csv")
+GENERIC_SHEET_RE = re.compile(r"^sheet\d*$", re.IGNORECASE)
+
+
+def link_source_files(source):
+    """Return the link files of `source`: the file itself, or a directory's files sorted by name."""
+    if not os.path.isdir(source):
+        return [os.path.abspath(source)]
+    return [
+        os.path.abspath(os.path.join(source, name))
+        for name in sorted(os.listdir(source))
+        if name.lower().endswith(LINK_FILE_EXTENSIONS) and not name.startswith(("~$", "."))
+    ]
+
+
+def source_signature(source):
+    """((path, mtime, size), ...) of every link file; changes when any file is added, removed or edited."""
+    return tuple((path,) + WorkbookCache.signature(path) for path in link_source_files(source))
+
+
+def file_team(path):
+    """data/links/roc_links.csv -> roc"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r"_links$", "", stem).lower()
+
+
+def _read_link_file(path):
+    """
+    Return {team: rows} for one link file. Workbook sheets are teams;
+    a CSV, or a workbook with a single default-named sheet (Sheet1),
+    belongs to the team in its file name.
+    """
+    sheets = workbook_cache.get_sheets(path)
+    if len(sheets) != 1:
+        return sheets
+
+    (sheet_name, rows), = sheets.items()
+    if not GENERIC_SHEET_RE.match(sheet_name):
+        return sheets
+    team = file_team(path)
+    return {team: tuple(
+        {**row, 'Team': team} if row.get('Team') == sheet_name else row for row in rows
+    )}
+
+
+def load_link_sheets(files, workers=None):
+    """
+    Read `files` concurrently in a thread pool and merge their rows by
+    team, in file order. Returns {team: rows}.
+    """
+    if len(files) <= 1:
+        per_file = [_read_link_file(path) for path in files]
+    else:
+        workers = workers or min(len(files), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="links-load") as pool:
+            per_file = list(pool.map(_read_link_file, files))
+
+    merged = {}
+    for sheets in per_file:
+        for team, rows in sheets.items():
+            merged.setdefault(team, []).extend(rows)
+    return {team: tuple(rows) for team, rows in merged.items()}
+
+
+def load_link_index(source, version=None, workers=None):
+    """Read every file of `source` and compile them into one LinkIndex."""
+    if version is None:
+        version = source_signature(source)
+    sheets = load_link_sheets([entry[0] for entry in version], workers)
+    last_modified = max((entry[1] for entry in version), default=0) / 1e9
+    return build_link_index(sheets, version, last_modified=last_modified)
+
+
+def get_link_index(source):
+    """
+    Return the LinkIndex for `source` (a workbook or a directory of link
+    files), rebuilding it only when a file changes on disk.
+    """
+    path = os.path.abspath(source)
+    index = _link_indexes.get(path)
+    if index is not None and path in _watched_paths:
+        # Swapped in by the background watcher; never stat or parse here
+        return index
+
+    if not os.path.exists(source):
+        abort(404, description=f"File not found: {source}")
+
+    version = source_signature(path)
+
+    with _link_index_lock:
+        index = _link_indexes.get(path)
+        if index is None or index.version != version:
+            index = load_link_index(path, version)
+            _link_indexes[path] = index
+        return index
+
+
+def loaded_link_index(source):
+    """Return the LinkIndex already loaded for `source`, or None. Never reads the files."""
+    return _link_indexes.get(os.path.abspath(source))
+
+
+def publish_link_index(source, index, watched=True):
+    """
+    Atomically replace the LinkIndex served for `source`. A watched path
+    is no longer checked on the request path (see watcher.py).
+    """
+    path = os.path.abspath(source)
+    with _link_index_lock:
+        _link_indexes[path] = index
+        if watched:
+            _watched_paths.add(path)
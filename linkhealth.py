@@ -0,0 +1,347 @@
+# linkhealth.py
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server, no cross-process locking
+    fcntl = None
+
+import click
+import requests
+from requests.adapters import HTTPAdapter
+
+from helpers import get_link_index
+
+HealthResult = namedtuple(
+    "HealthResult", ["url", "ok", "status", "error", "checked_at", "etag", "last_modified"]
+)
+
+# Servers that refuse HEAD get a (streamed, unread) GET instead
+HEAD_REFUSED = frozenset({403, 405, 501})
+
+# Internal tools behind SSO answer these to an anonymous check; they are up
+AUTH_REQUIRED = frozenset({401, 403})
+
+
+def is_reachable(status):
+    return status < 400 or status in AUTH_REQUIRED
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on `path` shared by every process on the host."""
+    with open(path, "a") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        yield
+
+
+# -----------------
+# Result store
+# -----------------
+class LinkHealthStore:
+    """
+    Last check result per URL, kept in a JSON file so every worker (and
+    the `flask check-links` cron job) shares one set of results.
+    Reads are cached until the file's (mtime, size) changes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._version = None
+        self._results = {}
+        self._broken = frozenset()
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version == self._version:
+            return
+        with self._lock:
+            try:
+                with open(self.path, encoding="utf-8") as fh:
+                    results = {url: HealthResult(url, *row) for url, row in json.load(fh).items()}
+            except (OSError, ValueError, TypeError) as e:
+                print(f"[HEALTH] Ignoring unreadable results {self.path}: {e}")
+                return
+            self._results = results
+            self._broken = frozenset(url for url, r in results.items() if not r.ok)
+            self._version = version
+
+    def reset_after_fork(self):
+        """Replace the lock in a forked child; the parent's checker may have held it."""
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        self._refresh()
+        return self._version
+
+    def results(self):
+        self._refresh()
+        return self._results
+
+    def broken(self):
+        """URLs whose last check failed."""
+        self._refresh()
+        return self._broken
+
+    def save(self, results):
+        """
+        Atomically replace the stored results with {url: HealthResult}.
+        Writers (the background checker, `flask check-links`) take turns
+        through a lock file next to the results.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        payload = {url: list(r[1:]) for url, r in results.items()}
+        with file_lock(self.path + ".lock"):
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    json.dump(payload, fh)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+
+# -----------------
+# Checker
+# -----------------
+class LinkHealthChecker:
+    """
+    Checks URLs from a thread pool.
+    - at most `per_host` requests in flight per host; the rest of a host's
+      URLs wait in its own queue, so a slow host never ties up the pool
+    - `timeout` seconds to connect and to read
+    - HEAD first, GET when the server refuses HEAD
+    - 401/403 count as reachable: SSO-protected tools refuse anonymous checks
+    - conditional requests (If-None-Match / If-Modified-Since) from the
+      previous result; 304 keeps it
+    - results younger than `ttl` seconds are not re-checked
+    """
+
+    def __init__(self, store, timeout=5.0, per_host=2, workers=16, ttl=3600, session=None):
+        self.store = store
+        self.timeout = timeout
+        self.per_host = per_host
+        self.workers = workers
+        self.ttl = ttl
+        self.session = session or self._make_session(workers)
+
+    @staticmethod
+    def _make_session(workers):
+        session = requests.Session()
+        session.headers["User-Agent"] = "bookmark-link-health/1.0"
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def check_url(self, url, previous=None):
+        """Check one URL; returns a HealthResult (never raises)."""
+        headers = {}
+        if previous is not None and previous.ok:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        try:
+            response = self.session.head(
+                url, headers=headers, timeout=self.timeout, allow_redirects=True
+            )
+            if response.status_code in HEAD_REFUSED:
+                response = self.session.get(
+                    url, headers=headers, timeout=self.timeout, allow_redirects=True, stream=True
+                )
+                response.close()
+        except requests.RequestException as e:
+            return HealthResult(url, False, None, type(e).__name__, time.time(), None, None)
+
+        if response.status_code == 304 and previous is not None:
+            return previous._replace(checked_at=time.time())
+
+        ok = is_reachable(response.status_code)
+        return HealthResult(
+            url,
+            ok,
+            response.status_code,
+            None if ok else response.reason,
+            time.time(),
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+
+    def check_all(self, urls):
+        """
+        Check every stale URL in `urls` and save the results.
+        Returns counts: checked, fresh (skipped), broken, seconds.
+        """
+        start = time.time()
+        previous = self.store.results()
+        urls = list(dict.fromkeys(urls))
+        stale = [u for u in urls if u not in previous or start - previous[u].checked_at >= self.ttl]
+
+        results = {u: previous[u] for u in urls if u in previous}
+        for result in self._check_by_host(stale, previous):
+            results[result.url] = result
+        self.store.save(results)
+
+        return {
+            "checked": len(stale),
+            "fresh": len(urls) - len(stale),
+            "broken": sum(1 for r in results.values() if not r.ok),
+            "seconds": time.time() - start,
+        }
+
+
+    def _check_by_host(self, urls, previous):
+        """
+        Yield a HealthResult per URL. Each host starts with `per_host`
+        checks, and gets its next URL submitted only when one of them
+        finishes.
+        """
+        queues = {}
+        for url in urls:
+            queues.setdefault(urlparse(url).netloc.lower(), deque()).append(url)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="link-health") as pool:
+            in_flight = {}
+
+            def submit(host):
+                url = queues[host].popleft()
+                in_flight[pool.submit(self.check_url, url, previous.get(url))] = host
+
+            # Round-robin over hosts, so the first checks spread across them
+            for _ in range(self.per_host):
+                for host, queue in queues.items():
+                    if queue:
+                        submit(host)
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host = in_flight.pop(future)
+                    yield future.result()
+                    if queues[host]:
+                        submit(host)
+
+
+def external_urls(index):
+    """Every http(s) URL in a LinkIndex."""
+    return [
+        link.URL
+        for links in index.teams.values()
+        for link in links
+        if link.URL.startswith(("http://", "https://"))
+    ]
+
+
+def checker_from_config(app):
+    return LinkHealthChecker(
+        app.extensions["link_health"],
+        timeout=app.config["LINK_HEALTH_TIMEOUT"],
+        per_host=app.config["LINK_HEALTH_PER_HOST"],
+        ttl=app.config["LINK_HEALTH_TTL"],
+    )
+
+
+def _elect_checker(path):
+    """
+    Try to become the host's only background checker. Returns the open lock
+    file (keep it open to stay elected), or None if another process holds it.
+    """
+    if fcntl is None:
+        return open(path, "a")
+    fh = open(path, "a")
+    try:
+        fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        fh.close()
+        return None
+    return fh
+
+
+def _health_loop(app, interval):
+    lock_path = app.config["LINK_HEALTH_FILE"] + ".checker"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    # Processes that lose the election retry, taking over if the checker exits
+    lock = _elect_checker(lock_path)
+    while lock is None:
+        time.sleep(interval)
+        lock = _elect_checker(lock_path)
+
+    checker = checker_from_config(app)
+    while True:
+        try:
+            with app.app_context():
+                urls = external_urls(get_link_index(app.config["LINKS_SOURCE"]))
+            counts = checker.check_all(urls)
+            if counts["checked"]:
+                print(f"[HEALTH] Checked {counts['checked']} links, {counts['broken']} broken")
+        except Exception as e:
+            print(f"[HEALTH] Link check failed: {e}")
+        time.sleep(interval)
+
+
+# -----------------
+# Wiring
+# -----------------
+def register_link_health(app):
+    """
+    Attach the result store, the `flask check-links` command and, when
+    LINK_HEALTH_INTERVAL > 0, a background checker thread. Pages only read
+    the stored results; nothing is checked at request time.
+    The thread is started by the first request a process serves, so CLI
+    commands never run it, and of all the serving processes on the host
+    only the one holding the `<LINK_HEALTH_FILE>.checker` lock checks links.
+    """
+    app.config.setdefault("LINK_HEALTH_FILE", os.path.join(app.instance_path, "link_health.json"))
+    app.config.setdefault("LINK_HEALTH_INTERVAL", float(os.getenv("LINK_HEALTH_INTERVAL", "0")))
+    app.config.setdefault("LINK_HEALTH_TTL", float(os.getenv("LINK_HEALTH_TTL", "3600")))
+    app.config.setdefault("LINK_HEALTH_TIMEOUT", float(os.getenv("LINK_HEALTH_TIMEOUT", "5")))
+    app.config.setdefault("LINK_HEALTH_PER_HOST", int(os.getenv("LINK_HEALTH_PER_HOST", "2")))
+
+    store = LinkHealthStore(app.config["LINK_HEALTH_FILE"])
+    app.extensions["link_health"] = store
+    app.jinja_env.globals["link_health"] = store
+
+    @app.cli.command("check-links")
+    def check_links_command():
+        """Check every external link and store the results."""
+        urls = external_urls(get_link_index(app.config["LINKS_SOURCE"]))
+        counts = checker_from_config(app).check_all(urls)
+        click.echo(
+            f"Checked {counts['checked']} links ({counts['fresh']} still fresh), "
+            f"{counts['broken']} broken, in {counts['seconds']:.1f}s"
+        )
+
+    interval = app.config["LINK_HEALTH_INTERVAL"]
+    if interval > 0:
+        started = []
+        start_lock = threading.Lock()
+
+        @app.before_request
+        def start_health_checker():
+            if started:
+                return
+            with start_lock:
+                if not started:
+                    threading.Thread(
+                        target=_health_loop, args=(app, interval), name="link-health", daemon=True
+                    ).start()
+                    started.append(True)
+    return store
@@ -0,0 +1,194 @@
+# logpipe.py
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops records instead of blocking when the queue is full.
+    In a forked child (e.g. a preloaded gunicorn worker) the writer threads
+    are gone, so `on_fork` is called to restart them on the first record.
+    """
+
+    def __init__(self, log_queue, on_fork=None):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.on_fork = on_fork
+        self._pid = os.getpid()
+        self._fork_lock = threading.Lock()   # only ever taken in a forked child
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            with self._fork_lock:
+                # Re-check: another thread may have restarted the pipeline first
+                if self._pid != os.getpid():
+                    if self.on_fork is not None:
+                        self.on_fork()
+                    self._pid = os.getpid()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingJsonHandler(logging.Handler):
+    """
+    Runs on the QueueListener thread and writes through `stream_handler`
+    (a _RotatingStream). Buffers records, folds identical
+    errors (same level, code, path and message) into one entry with a
+    count, and writes them as JSON lines every `flush_interval` seconds.
+    A given error is written at most once per `repeat_interval` seconds;
+    repeats in between only raise its count.
+    """
+
+    def __init__(self, stream_handler, flush_interval=2.0, repeat_interval=60.0, max_pending=10_000):
+        super().__init__()
+        self.stream_handler = stream_handler
+        self.flush_interval = flush_interval
+        self.repeat_interval = repeat_interval
+        self.max_pending = max_pending
+        self._pending = {}        # key -> entry dict
+        self._last_written = {}   # key -> time of last write
+        self._buffer_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._start_flusher()
+
+    def _start_flusher(self):
+        self._flusher = threading.Thread(target=self._flush_loop, name="log-flusher", daemon=True)
+        self._flusher.start()
+
+    def after_fork(self):
+        """
+        Restart the flusher in a forked child. The inherited buffer is
+        dropped (the parent writes it) and the lock replaced, since the
+        parent's flusher may have held it at the time of the fork.
+        """
+        self._buffer_lock = threading.Lock()
+        self._pending = {}
+        self._start_flusher()
+
+    @staticmethod
+    def _key(record):
+        return (record.levelname, str(getattr(record, "code", "")), getattr(record, "path", ""), record.getMessage())
+
+    def emit(self, record):
+        key = self._key(record)
+        now = record.created
+        with self._buffer_lock:
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry["count"] += 1
+                entry["last_seen"] = now
+                return
+            if len(self._pending) >= self.max_pending:
+                return
+            self._pending[key] = {
+                "level": record.levelname,
+                "code": getattr(record, "code", None),
+                "message": record.getMessage(),
+                "path": getattr(record, "path", None),
+                "ip": getattr(record, "ip", None),
+                "agent": getattr(record, "agent", None),
+                "source": f"{record.module}:{record.lineno}",
+                "first_seen": now,
+                "last_seen": now,
+                "count": 1,
+            }
+
+    def flush(self, force=False):
+        now = time.time()
+        with self._buffer_lock:
+            ready = []
+            for key, entry in list(self._pending.items()):
+                if force or now - self._last_written.get(key, 0) >= self.repeat_interval:
+                    ready.append(entry)
+                    self._last_written[key] = now
+                    del self._pending[key]
+
+            # Forget keys that have been quiet for a while
+            if len(self._last_written) > self.max_pending:
+                cutoff = now - self.repeat_interval
+                self._last_written = {k: t for k, t in self._last_written.items() if t >= cutoff}
+
+        if not ready:
+            return
+        lines = []
+        for entry in ready:
+            line = {"time": datetime.fromtimestamp(entry["first_seen"], timezone.utc).isoformat(), **entry}
+            line["first_seen"] = round(entry["first_seen"], 3)
+            line["last_seen"] = round(entry["last_seen"], 3)
+            lines.append(json.dumps(line, default=str))
+        self.stream_handler.acquire()
+        try:
+            self.stream_handler.write_lines("\n".join(lines) + "\n")
+        finally:
+            self.stream_handler.release()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def close(self):
+        self._stop.set()
+        self.flush(force=True)
+        self.stream_handler.close()
+        super().close()
+
+
+class _RotatingStream(RotatingFileHandler):
+    """RotatingFileHandler used as a raw, size-rotated line sink."""
+
+    def write_lines(self, text):
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes and self.stream.tell() + len(text) >= self.maxBytes:
+            self.doRollover()
+        self.stream.write(text)
+        self.stream.flush()
+
+
+def register_log_pipeline(logger, filename, level=logging.ERROR, queue_size=10_000,
+                          flush_interval=2.0, repeat_interval=60.0):
+    """
+    Route `logger` through a bounded queue to a background thread that
+    writes batched, de-duplicated JSON lines to `filename`.
+    Request threads only do a non-blocking queue put.
+    Returns (queue handler, listener).
+    """
+    log_queue = queue.Queue(maxsize=queue_size)
+
+    sink = BatchingJsonHandler(
+        _RotatingStream(filename, maxBytes=10_000_000, backupCount=5, delay=True),
+        flush_interval=flush_interval,
+        repeat_interval=repeat_interval,
+    )
+    listener = QueueListener(log_queue, sink, respect_handler_level=False)
+    listener.start()
+
+    def _restart_in_child():
+        # New queue: the inherited one holds the parent's records and possibly its locks
+        queue_handler.queue = listener.queue = queue.Queue(maxsize=queue_size)
+        listener._thread = None
+        listener.start()
+        sink.after_fork()
+
+    queue_handler = NonBlockingQueueHandler(log_queue, on_fork=_restart_in_child)
+    queue_handler.setLevel(level)
+    logger.addHandler(queue_handler)
+
+    def _shutdown():
+        listener.stop()
+        sink.close()
+
+    atexit.register(_shutdown)
+    return queue_handler, listener
@@ -0,0 +1,269 @@
+# metrics.py
+import hmac
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, jsonify, has_request_context, before_render_template, template_rendered, request, abort
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from models import db
+from pagecache import fragment_cache
+
+
+# -----------------
+# Engine / pool configuration
+# -----------------
+def engine_options(uri):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS from the environment:
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING.
+    Unset sizing options keep SQLAlchemy's defaults.
+    """
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+
+    # In-memory SQLite can't use a QueuePool
+    if ":memory:" in uri or uri.rstrip("/") == "sqlite:":
+        return options
+
+    options["poolclass"] = TimedQueuePool
+    for env_name, key in (
+        ("DB_POOL_SIZE", "pool_size"),
+        ("DB_MAX_OVERFLOW", "max_overflow"),
+        ("DB_POOL_TIMEOUT", "pool_timeout"),
+    ):
+        value = os.getenv(env_name)
+        if value:
+            options[key] = int(value)
+    return options
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_metrics.record_wait(time.perf_counter() - start)
+
+
+# -----------------
+# Counters
+# -----------------
+class DBMetrics:
+    """Process-wide pool wait and per-request query counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_request(self, queries):
+        with self._lock:
+            self.requests += 1
+            self.queries += queries
+            self.max_queries = max(self.max_queries, queries)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.waits,
+                "wait_seconds_total": round(self.wait_seconds, 6),
+                "wait_seconds_max": round(self.max_wait_seconds, 6),
+                "requests": self.requests,
+                "queries_total": self.queries,
+                "queries_per_request_avg": round(self.queries / self.requests, 3) if self.requests else 0.0,
+                "queries_per_request_max": self.max_queries,
+            }
+
+
+db_metrics = DBMetrics()
+
+
+# -----------------
+# Request timings
+# -----------------
+class Histogram:
+    """Cumulative latency histogram with fixed millisecond buckets."""
+
+    BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, ms):
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total_ms += ms
+
+    def to_dict(self):
+        buckets, running = {}, 0
+        for bound, n in zip(self.BUCKETS_MS + ("+Inf",), self.counts):
+            running += n
+            buckets[str(bound)] = running
+        return {"count": self.count, "sum_ms": round(self.total_ms, 3), "buckets": buckets}
+
+
+class TimingMetrics:
+    """Per-phase histograms of time spent per request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+
+    def record_request(self, timings):
+        with self._lock:
+            for name, seconds in timings.items():
+                self.histograms.setdefault(name, Histogram()).observe(seconds * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: h.to_dict() for name, h in sorted(self.histograms.items())}
+
+
+timing_metrics = TimingMetrics()
+
+
+def record_timing(name, seconds):
+    """Add `seconds` to the current request's `name` phase (no-op outside requests)."""
+    if has_request_context():
+        timings = g.setdefault("timings", {})
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(name):
+    """Time a block or function (as a decorator) into the request's `name` phase."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - start)
+
+
+def server_timing_header(timings):
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
+
+
+def pool_status(engine):
+    """Current pool occupancy (QueuePool only)."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+
+
+# -----------------
+# Flask wiring
+# -----------------
+def register_metrics(app):
+    """
+    Time each request by phase (excel, links, db, render, sqli, total),
+    count DB queries, send a Server-Timing header and expose everything
+    on /metrics, along with the hit/miss counts of the in-process caches.
+    /metrics is only served to admins, or to scrapers sending
+    `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+    app.config.setdefault("SERVER_TIMING", os.getenv("SERVER_TIMING", "1") == "1")
+    app.config.setdefault("METRICS_TOKEN", os.getenv("METRICS_TOKEN"))
+
+    with app.app_context():
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def _start_query(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+            if has_request_context():
+                g.db_queries = g.get("db_queries", 0) + 1
+
+        @event.listens_for(db.engine, "after_cursor_execute")
+        def _end_query(conn, cursor, statement, parameters, context, executemany):
+            record_timing("db", time.perf_counter() - conn.info["query_start"].pop())
+
+    @before_render_template.connect_via(app)
+    def _start_render(sender, template, context, **extra):
+        g.render_start = time.perf_counter()
+
+    @template_rendered.connect_via(app)
+    def _end_render(sender, template, context, **extra):
+        start = g.pop("render_start", None)
+        if start is not None:
+            record_timing("render", time.perf_counter() - start)
+
+    @app.before_request
+    def _start_request():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def _server_timing(response):
+        start = g.get("request_start")
+        if start is not None and app.config["SERVER_TIMING"]:
+            timings = {**g.get("timings", {}), "total": time.perf_counter() - start}
+            response.headers["Server-Timing"] = server_timing_header(timings)
+        return response
+
+    @app.teardown_request
+    def _record_request(exc):
+        start = g.get("request_start")
+        if start is None:
+            return
+        db_metrics.record_request(g.get("db_queries", 0))
+        timing_metrics.record_request(
+            {**g.get("timings", {}), "total": time.perf_counter() - start}
+        )
+
+    def _may_read_metrics():
+        token = app.config["METRICS_TOKEN"]
+        if token and hmac.compare_digest(
+            request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()
+        ):
+            return True
+        return current_user.is_authenticated and current_user.role == "admin"
+
+    @app.route("/metrics")
+    def metrics():
+        from helpers import workbook_cache_stats   # helpers imports this module
+
+        if not _may_read_metrics():
+            abort(403)
+
+        caches = {"workbook": workbook_cache_stats(), "fragments": fragment_cache.stats()}
+        if "compressed_cache" in app.extensions:
+            caches["compressed"] = app.extensions["compressed_cache"].stats()
+        return jsonify({
+            "db": {
+                "pool": pool_status(db.engine),
+                **db_metrics.snapshot(),
+            },
+            "timings": timing_metrics.snapshot(),
+            "caches": caches,
+        })
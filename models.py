@@ -1,126 +1,242 @@
-# models.py
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.dialects.postgresql import UUID
-from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import Column, String, UniqueConstraint, ForeignKey
-import uuid
-
-db = SQLAlchemy()
-
-# ============================================================
-# Team Table
-# ============================================================
-class Team(db.Model):
-    __tablename__ = "teams"
-    __table_args__ = {"schema": "housebox"}
-
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    name = Column(String(100), unique=True, nullable=False)
-
-    def __repr__(self):
-        return f"<Team {self.name}>"
-
-
-# ============================================================
-# UserTeam Mapping Table
-# (id, user_id, email, team_name)
-# ============================================================
-class UserTeam(db.Model):
-    __tablename__ = "user_teams"
-    __table_args__ = (
-        UniqueConstraint("user_id", "team_name", name="uq_user_team"),
-        {"schema": "housebox"},
-    )
-
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("housebox.users.id"), nullable=False)
-    email = Column(String(255), nullable=False)
-    team_name = Column(String(100), nullable=False)
-
-    def __repr__(self):
-        return f"<UserTeam user={self.user_id}, team={self.team_name}>"
-
-
-# ============================================================
-# User Table
-# ============================================================
-class User(UserMixin, db.Model):
-    __tablename__ = "users"
-    __table_args__ = {"schema": "housebox"}
-
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    email = Column(String(255), unique=True, nullable=False)
-    role = Column(String(50), nullable=False)
-    password_hash = Column(String(255), nullable=False)
-
-    # Relationship: A user has many user-team entries
-    teams = db.relationship("UserTeam", backref="user", lazy="dynamic")
-
-    # --------------------------
-    # Constructor
-    # --------------------------
-    def __init__(self, email, role, password=None):
-        self.email = email
-        self.role = role
-        if password:
-            self.set_password(password)
-
-    # --------------------------
-    # Password Helpers
-    # --------------------------
-    def set_password(self, raw_password):
-        self.password_hash = generate_password_hash(raw_password)
-
-    def check_password(self, raw_password):
-        return check_password_hash(self.password_hash, raw_password)
-
-    def get_id(self):
-        return str(self.id)
-
-    # --------------------------
-    # Add team to user
-    # --------------------------
-    def add_team(self, team_name, commit=True):
-        # Ensure the team exists in teams table
-        team = Team.query.filter_by(name=team_name).first()
-        if not team:
-            team = Team(name=team_name)
-            db.session.add(team)
-            if commit:
-                db.session.commit()
-
-        # Check if already mapped
-        existing = UserTeam.query.filter_by(
-            user_id=self.id,
-            team_name=team_name
-        ).first()
-
-        if not existing:
-            db.session.add(
-                UserTeam(
-                    user_id=self.id,
-                    email=self.email,
-                    team_name=team_name
-                )
-            )
-
-        if commit:
-            db.session.commit()
-
-    # --------------------------
-    # Helper: return list of team names
-    # --------------------------
-    def get_team_names(self):
-        return [t.team_name for t in self.teams.all()]
-
-    # --------------------------
-    # JSON Output
-    # --------------------------
-    def to_dict(self):
-        return {
-            "id": str(self.id),
-            "email": self.email,
-            "role": self.role,
-            "teams": self.get_team_names(),
-        }
+# models.py
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import UUID
+from flask_login import UserMixin
+from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import Column, String, Integer, UniqueConstraint, ForeignKey, inspect, event, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.base import NO_VALUE
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+db = SQLAlchemy()
+
+
+# ============================================================
+# Password hashing in bulk
+# ============================================================
+def hash_passwords(passwords, workers=None, pool=None):
+    """
+    Hash many passwords with `generate_password_hash`.
+    - workers: size of the process pool (default: CPU count);
+      1 hashes inline on the calling thread.
+    - pool: an existing ProcessPoolExecutor of `workers` processes to
+      reuse across batches.
+    Returns the hashes in input order.
+    """
+    passwords = list(passwords)
+    workers = workers or os.cpu_count() or 1
+    if pool is None:
+        if workers <= 1 or len(passwords) < 2:
+            return [generate_password_hash(p) for p in passwords]
+        with ProcessPoolExecutor(max_workers=workers) as own_pool:
+            return hash_passwords(passwords, workers, own_pool)
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
+# ============================================================
+# Schema version
+# Bump SCHEMA_VERSION whenever seed.init_db gains a migration.
+# ============================================================
+SCHEMA_VERSION = 2
+
+
+class SchemaVersion(db.Model):
+    __tablename__ = "schema_version"
+    __table_args__ = {"schema": "housebox"}
+
+    version = Column(Integer, primary_key=True)
+
+    def __repr__(self):
+        return f"<SchemaVersion {self.version}>"
+
+
+def check_schema_version():
+    """
+    One cheap query run by every worker at startup.
+    Returns True when the database matches SCHEMA_VERSION.
+    """
+    try:
+        version = db.session.execute(
+            select(SchemaVersion.version).order_by(SchemaVersion.version.desc()).limit(1)
+        ).scalar()
+    except SQLAlchemyError:
+        db.session.rollback()
+        version = None
+
+    if version != SCHEMA_VERSION:
+        print(f"[SCHEMA] Database schema is at version {version}, "
+              f"expected {SCHEMA_VERSION}. Run `flask init-db`.")
+        return False
+    return True
+
+
+def attach_sqlite_schema(engine, uri):
+    """
+    SQLite has no schemas: attach a sibling database file as `housebox`
+    so the same models work for local development and benchmarks.
+    """
+    path = uri.split("///", 1)[-1] if "///" in uri else ""
+    target = f"{path}.housebox" if path and path != ":memory:" else ":memory:"
+
+    @event.listens_for(engine, "connect")
+    def _attach_housebox(dbapi_conn, _record):
+        dbapi_conn.execute(f"ATTACH DATABASE '{target}' AS housebox")
+
+
+# ============================================================
+# Team Table
+# ============================================================
+class Team(db.Model):
+    __tablename__ = "teams"
+    __table_args__ = {"schema": "housebox"}
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String(100), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f"<Team {self.name}>"
+
+
+# ============================================================
+# UserTeam Mapping Table
+# (id, user_id, email, team_name)
+# ============================================================
+class UserTeam(db.Model):
+    __tablename__ = "user_teams"
+    __table_args__ = (
+        UniqueConstraint("user_id", "team_name", name="uq_user_team"),
+        {"schema": "housebox"},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("housebox.users.id"), nullable=False)
+    email = Column(String(255), nullable=False)
+    team_name = Column(String(100), nullable=False)
+
+    def __repr__(self):
+        return f"<UserTeam user={self.user_id}, team={self.team_name}>"
+
+
+# ============================================================
+# User Table
+# ============================================================
+class User(UserMixin, db.Model):
+    __tablename__ = "users"
+    __table_args__ = {"schema": "housebox"}
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    email = Column(String(255), unique=True, nullable=False)
+    role = Column(String(50), nullable=False)
+    password_hash = Column(String(255), nullable=False)
+
+    # Bumped whenever role or teams change; invalidates session principals
+    auth_epoch = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Relationship: A user has many user-team entries
+    teams = db.relationship("UserTeam", backref="user", lazy="dynamic")
+
+    # Read-only, eager-loadable view of the same rows (see load_user)
+    memberships = db.relationship("UserTeam", viewonly=True)
+
+    # --------------------------
+    # Constructor
+    # --------------------------
+    def __init__(self, email, role, password=None):
+        self.email = email
+        self.role = role
+        if password:
+            self.set_password(password)
+
+    # --------------------------
+    # Password Helpers
+    # --------------------------
+    def set_password(self, raw_password):
+        self.password_hash = generate_password_hash(raw_password)
+
+    def check_password(self, raw_password):
+        return check_password_hash(self.password_hash, raw_password)
+
+    def get_id(self):
+        return str(self.id)
+
+    # --------------------------
+    # Add team to user
+    # --------------------------
+    def add_team(self, team_name, commit=True):
+        # Ensure the team exists in teams table
+        team = Team.query.filter_by(name=team_name).first()
+        if not team:
+            team = Team(name=team_name)
+            db.session.add(team)
+            if commit:
+                db.session.commit()
+
+        # Check if already mapped
+        existing = UserTeam.query.filter_by(
+            user_id=self.id,
+            team_name=team_name
+        ).first()
+
+        if not existing:
+            db.session.add(
+                UserTeam(
+                    user_id=self.id,
+                    email=self.email,
+                    team_name=team_name
+                )
+            )
+            self.bump_auth_epoch()
+
+        self._invalidate_teams()
+
+        if commit:
+            db.session.commit()
+
+    # --------------------------
+    # Helper: return list of team names
+    # (cached on the instance, i.e. per request)
+    # --------------------------
+    def get_team_names(self):
+        names = self.__dict__.get("_team_names")
+        if names is None:
+            names = tuple(t.team_name for t in self.memberships)
+            self._team_names = names
+        return list(names)
+
+    def has_team(self, team_name):
+        """O(1), case-insensitive team membership check."""
+        team_set = self.__dict__.get("_team_set")
+        if team_set is None:
+            team_set = frozenset(t.lower() for t in self.get_team_names())
+            self._team_set = team_set
+        return team_name.lower() in team_set
+
+    def bump_auth_epoch(self):
+        self.auth_epoch = (self.auth_epoch or 0) + 1
+
+    def _invalidate_teams(self):
+        self._team_names = None
+        self._team_set = None
+        if inspect(self).persistent:
+            db.session.expire(self, ["memberships"])
+
+    # --------------------------
+    # JSON Output
+    # --------------------------
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "email": self.email,
+            "role": self.role,
+            "teams": self.get_team_names(),
+        }
+
+
+@event.listens_for(User.role, "set")
+def _role_changed(user, value, oldvalue, initiator):
+    # Role changes must invalidate session principals (see um.py)
+    if oldvalue is not NO_VALUE and value != oldvalue:
+        user.bump_auth_epoch()
@@ -0,0 +1,92 @@
+# pagecache.py
+import hashlib
+import os
+import threading
+
+from flask import render_template, request, make_response
+from markupsafe import Markup
+
+
+# -----------------
+# Rendered fragment cache
+# -----------------
+class FragmentCache:
+    """
+    Rendered HTML fragments keyed by (template, team, extra context, index version).
+    Entries for older versions are dropped as soon as a new version is seen.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fragments = {}
+        self._versions = {}   # (template, team, context) -> current version
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, template_name, team, index, version=None, **context):
+        """
+        Render `template_name` with the team's links, or return the cached HTML.
+        `version` replaces the index version in the key when the fragment
+        also depends on other data (e.g. link health).
+        """
+        version = index.version if version is None else version
+        slot = (template_name, team, tuple(sorted(context.items())))
+        key = slot + (version,)
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self.hits += 1
+                return fragment
+
+        fragment = Markup(render_template(template_name, links=index.links(team), **context))
+
+        with self._lock:
+            self.misses += 1
+            stale = self._versions.get(slot)
+            if stale is not None and stale != version:
+                self._fragments.pop(slot + (stale,), None)
+            self._versions[slot] = version
+            self._fragments[key] = fragment
+        return fragment
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._fragments)}
+
+
+fragment_cache = FragmentCache()
+
+
+# -----------------
+# Conditional GET (ETag)
+# -----------------
+def template_version(template_folder):
+    """Hash of every template file, so ETags change when templates are deployed."""
+    digest = hashlib.sha1()
+    for root, _, files in sorted(os.walk(template_folder)):
+        for name in sorted(files):
+            with open(os.path.join(root, name), "rb") as fh:
+                digest.update(name.encode())
+                digest.update(fh.read())
+    return digest.hexdigest()[:12]
+
+
+def page_etag(*parts):
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:20]
+
+
+def conditional_page(etag, render):
+    """
+    Answer 304 when the client's ETag still matches; otherwise call
+    `render()` for the body. Pages are private and revalidated every time.
+    No Last-Modified: a page also depends on login state, link health,
+    templates and assets, which only the ETag covers.
+    """
+    # Weak match: compressed responses carry a weak version of the ETag
+    not_modified = request.if_none_match.contains_weak(etag)
+
+    response = make_response(("", 304) if not_modified else render())
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,180 @@
+# provision.py
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, User, Team, UserTeam, hash_passwords
+
+
+# -----------------
+# Reading HR exports
+# -----------------
+def read_assignments(file_path):
+    """
+    Read users and team assignments from a CSV or XLSX export.
+    Expected columns: email, role, teams, password
+    (`teams` is a ';' or ',' separated list).
+    Returns: list of dicts {email, role, teams, password}.
+    """
+    if file_path.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(file_path, dtype=str)
+    else:
+        df = pd.read_csv(file_path, dtype=str)
+    df = df.fillna('')
+    df.columns = [c.strip().lower() for c in df.columns]
+
+    records = []
+    for row in df.to_dict(orient='records'):
+        teams = row.get('teams', '').replace(',', ';')
+        records.append({
+            "email": row.get('email', '').strip(),
+            "role": row.get('role', '').strip(),
+            "teams": [t.strip() for t in teams.split(';') if t.strip()],
+            "password": row.get('password', ''),
+        })
+    return records
+
+
+def validate_records(records):
+    """Split records into (valid, rejected); later duplicates of an email are dropped."""
+    valid, rejected, seen = [], [], set()
+    for rec in records:
+        email = rec.get("email", "")
+        if "@" not in email or not rec.get("role") or not rec.get("password") or email in seen:
+            rejected.append(rec)
+            continue
+        seen.add(email)
+        valid.append(rec)
+    return valid, rejected
+
+
+# -----------------
+# Set-based upserts
+# -----------------
+def _insert(model):
+    """INSERT for the current dialect (both support ON CONFLICT DO NOTHING)."""
+    if db.engine.dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return pg_insert(model)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def bulk_provision(records, batch_size=1000, workers=None):
+    """
+    Create missing teams, users and user-team mappings in batches using
+    INSERT ... ON CONFLICT DO NOTHING. Existing users keep their password
+    and role; they only gain new team mappings.
+    Passwords are hashed after validation, in a pool of `workers` processes
+    (default: CPU count; 1 hashes inline). The pool is only started by the
+    first batch with new users, so a re-run that creates none never forks.
+    Returns a dict of row counts, elapsed seconds and rows/second.
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = []   # the hashing pool, once started
+    try:
+        return _bulk_provision(records, batch_size, pool, workers)
+    finally:
+        if pool:
+            pool[0].shutdown()
+
+
+def _bulk_provision(records, batch_size, pool, workers):
+    start = time.perf_counter()
+    valid, rejected = validate_records(records)
+    for rec in rejected:
+        print(f"[PROVISION] Skipping invalid row: {rec.get('email') or rec}")
+
+    counts = {"teams": 0, "users": 0, "user_teams": 0, "rejected": len(rejected)}
+
+    # Teams first: one statement for the whole import
+    team_names = sorted({t for rec in valid for t in rec["teams"]})
+    for batch in _chunks(team_names, batch_size):
+        inserted = db.session.execute(
+            _insert(Team)
+            .values([{"id": uuid.uuid4(), "name": name} for name in batch])
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Team.id)
+        ).all()
+        counts["teams"] += len(inserted)
+
+    for batch in _chunks(valid, batch_size):
+        emails = [rec["email"] for rec in batch]
+        existing = set(db.session.execute(
+            select(User.email).where(User.email.in_(emails))
+        ).scalars())
+
+        # Hash passwords only for users that will actually be inserted
+        to_create = [rec for rec in batch if rec["email"] not in existing]
+        if workers > 1 and len(to_create) > 1 and not pool:
+            pool.append(ProcessPoolExecutor(max_workers=workers))
+        hashes = hash_passwords(
+            [rec["password"] for rec in to_create], workers=workers, pool=pool[0] if pool else None
+        )
+        new_users = [
+            {
+                "id": uuid.uuid4(),
+                "email": rec["email"],
+                "role": rec["role"],
+                "password_hash": password_hash,
+                "auth_epoch": 0,
+            }
+            for rec, password_hash in zip(to_create, hashes)
+        ]
+        if new_users:
+            inserted = db.session.execute(
+                _insert(User)
+                .values(new_users)
+                .on_conflict_do_nothing(index_elements=["email"])
+                .returning(User.id)
+            ).all()
+            counts["users"] += len(inserted)
+
+        user_ids = dict(db.session.execute(
+            select(User.email, User.id).where(User.email.in_(emails))
+        ).all())
+
+        mappings = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_ids[rec["email"]],
+                "email": rec["email"],
+                "team_name": team,
+            }
+            for rec in batch if rec["email"] in user_ids
+            for team in rec["teams"]
+        ]
+        if mappings:
+            inserted = db.session.execute(
+                _insert(UserTeam)
+                .values(mappings)
+                .on_conflict_do_nothing(index_elements=["user_id", "team_name"])
+                .returning(UserTeam.user_id)
+            ).all()
+            counts["user_teams"] += len(inserted)
+
+            # New teams invalidate session principals of those users
+            changed = {row.user_id for row in inserted}
+            if changed:
+                db.session.execute(
+                    update(User)
+                    .where(User.id.in_(changed))
+                    .values(auth_epoch=User.auth_epoch + 1)
+                )
+
+        db.session.commit()
+
+    elapsed = time.perf_counter() - start
+    total = counts["teams"] + counts["users"] + counts["user_teams"]
+    counts["seconds"] = elapsed
+    counts["rows_per_second"] = total / elapsed if elapsed else 0.0
+    return counts
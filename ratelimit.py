@@ -0,0 +1,179 @@
+# ratelimit.py
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+
+from sqlalchemy.engine import make_url
+from limits.storage import Storage, SlidingWindowCounterSupport
+from limits.storage.base import TimestampedSlidingWindow
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Rate-limit storage shared by every worker process on a host, backed by
+    a single SQLite file in WAL mode. Counters are updated with atomic
+    upserts, so all processes see the same counts.
+
+    URI: sqlite:///path/to/ratelimit.db?max_keys=100000&purge_interval=30
+    (parsed like DATABASE_URL: sqlite:///x.db is relative, sqlite:////x.db absolute)
+    - Expired keys are purged at most every `purge_interval` seconds.
+    - When more than `max_keys` keys exist, the ones closest to expiry
+      are evicted, bounding the file to O(max_keys) rows.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        url = make_url(uri or "sqlite:///ratelimit.db")
+        query = {k: v[-1] if isinstance(v, tuple) else v for k, v in url.query.items()}
+        self.path = url.database or "ratelimit.db"
+        self.max_keys = int(query.get("max_keys", options.get("max_keys", 100_000)))
+        self.purge_interval = float(query.get("purge_interval", options.get("purge_interval", 30)))
+
+        self._local = threading.local()
+        self._next_purge = 0.0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions)
+
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "key TEXT PRIMARY KEY, value INTEGER NOT NULL, expiry REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_counters_expiry ON counters (expiry)")
+
+    # -----------------
+    # Connection handling (one per thread, reopened after fork)
+    # -----------------
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    # -----------------
+    # Fixed-window counters
+    # -----------------
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        self._maybe_purge(now)
+        row = self._conn().execute(
+            "INSERT INTO counters (key, value, expiry) VALUES (?1, ?2, ?3) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "value = CASE WHEN counters.expiry <= ?4 THEN ?2 ELSE counters.value + ?2 END, "
+            "expiry = CASE WHEN counters.expiry <= ?4 THEN ?3 ELSE counters.expiry END "
+            "RETURNING value",
+            (key, amount, now + expiry, now),
+        ).fetchone()
+        return row[0]
+
+    def decr(self, key, amount=1):
+        row = self._conn().execute(
+            "UPDATE counters SET value = MAX(value - ?, 0) WHERE key = ? RETURNING value",
+            (amount, key),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM counters WHERE key = ? AND expiry > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._conn().execute(
+            "SELECT expiry FROM counters WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def clear(self, key):
+        self._conn().execute("DELETE FROM counters WHERE key = ?", (key,))
+
+    def reset(self):
+        return self._conn().execute("DELETE FROM counters").rowcount
+
+    def check(self):
+        try:
+            self._conn().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    # -----------------
+    # Sliding-window counters (same algorithm as limits' MemoryStorage)
+    # -----------------
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count, previous_ttl, current_count, _ = self._sliding_window_info(
+            previous_key, current_key, expiry, now
+        )
+        weighted_count = previous_count * previous_ttl / expiry + current_count
+        if floor(weighted_count) + amount > limit:
+            return False
+
+        current_count = self.incr(current_key, 2 * expiry, amount=amount)
+        weighted_count = previous_count * previous_ttl / expiry + current_count
+        if floor(weighted_count) > limit:
+            # Another process won the race: give the hit back
+            self.decr(current_key, amount)
+            return False
+        return True
+
+    def _sliding_window_info(self, previous_key, current_key, expiry, now):
+        previous_count = self.get(previous_key)
+        current_count = self.get(current_key)
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(self, key, expiry):
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._sliding_window_info(previous_key, current_key, expiry, now)
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+
+    # -----------------
+    # Eviction of idle keys
+    # -----------------
+    def _maybe_purge(self, now):
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.purge_interval
+        self.purge(now)
+
+    def purge(self, now=None):
+        """Delete expired keys, then the soonest-expiring ones above max_keys."""
+        now = now or time.time()
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM counters WHERE expiry <= ?", (now,)).rowcount
+        excess = conn.execute("SELECT COUNT(*) FROM counters").fetchone()[0] - self.max_keys
+        if excess > 0:
+            removed += conn.execute(
+                "DELETE FROM counters WHERE key IN "
+                "(SELECT key FROM counters ORDER BY expiry LIMIT ?)",
+                (excess,),
+            ).rowcount
+        return removed
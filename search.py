@@ -0,0 +1,220 @@
+# search.py
+import re
+import threading
+from bisect import bisect_left, bisect_right
+
+from flask import current_app, request, jsonify
+from flask_login import login_required, current_user
+
+from helpers import get_link_index
+from metrics import timed
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# URL noise that would match nearly every link
+STOP_TOKENS = frozenset({"http", "https", "www", "com", "html"})
+
+MAX_PREFIX_EXPANSIONS = 64   # tokens a short prefix may expand to
+MIN_TYPO_LENGTH = 4          # shorter terms only match exactly / by prefix
+
+# Match quality, summed per result for ranking
+EXACT, PREFIX, TYPO = 3, 2, 1
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOP_TOKENS]
+
+
+def deletions(token):
+    """All variants of `token` with one character removed."""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+# -----------------
+# Inverted index
+# -----------------
+class SearchIndex:
+    """
+    Inverted index over the title, URL and team of every link in a LinkIndex.
+
+    - documents are numbered team by team, so each team owns a contiguous
+      id range and per-team filtering is a bisect on the sorted postings
+    - prefix matching: bisect over the sorted token list
+    - typo tolerance: one-deletion neighbourhoods (symmetric delete),
+      so a term with one wrong, missing or extra character still matches
+    """
+
+    def __init__(self, link_index):
+        self.version = link_index.version
+        self.docs = []
+        self.doc_tokens = []
+        self.team_ranges = {}   # team -> (first doc id, last doc id + 1)
+        postings = {}
+
+        for team in sorted(link_index.teams):
+            start = len(self.docs)
+            for link in link_index.links(team):
+                doc_id = len(self.docs)
+                tokens = frozenset(tokenize(f"{link.Title} {link.URL} {link.Team} {team}"))
+                self.docs.append((team, link))
+                self.doc_tokens.append(tokens)
+                for token in tokens:
+                    postings.setdefault(token, []).append(doc_id)
+            self.team_ranges[team] = (start, len(self.docs))
+
+        # Doc ids were appended in increasing order, so each list is sorted
+        self.postings = {token: tuple(ids) for token, ids in postings.items()}
+        self.tokens = sorted(self.postings)
+
+        self.neighbours = {}   # deletion variant -> tokens it came from
+        for token in self.tokens:
+            if len(token) >= MIN_TYPO_LENGTH and not token.isdigit():
+                for variant in deletions(token):
+                    self.neighbours.setdefault(variant, []).append(token)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def expand(self, term):
+        """Return [(quality, token)] for the index tokens matching `term`, best first."""
+        matches = []
+        if term in self.postings:
+            matches.append((EXACT, term))
+
+        lo = bisect_left(self.tokens, term)
+        hi = bisect_right(self.tokens, term + "\uffff", lo)
+        for token in self.tokens[lo:min(hi, lo + MAX_PREFIX_EXPANSIONS)]:
+            if token != term:
+                matches.append((PREFIX, token))
+
+        if not matches and len(term) >= MIN_TYPO_LENGTH:
+            found = set(self.neighbours.get(term, ()))
+            for variant in deletions(term):
+                found.update(self.neighbours.get(variant, ()))
+                if variant in self.postings:
+                    found.add(variant)
+            matches.extend((TYPO, token) for token in sorted(found))
+        return matches
+
+    def _team_postings(self, token, ranges):
+        """Yield the doc ids of `token` that fall inside the allowed team ranges."""
+        ids = self.postings[token]
+        for start, end in ranges:
+            yield from ids[bisect_left(ids, start):bisect_left(ids, end)]
+
+    def search(self, query, teams, limit=20):
+        """
+        Return up to `limit` (team, Link) pairs matching every term of
+        `query`, restricted to `teams`, best matches first.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        ranges = [self.team_ranges[t] for t in sorted(teams) if t in self.team_ranges]
+        if not terms or not ranges:
+            return []
+
+        expanded = [self.expand(term) for term in terms]
+        if not all(expanded):
+            return []
+
+        # Drive the scan from the most selective term; check the others per doc
+        expanded.sort(key=lambda matches: sum(len(self.postings[t]) for _, t in matches))
+        driver = expanded[0]
+        others = []
+        for matches in expanded[1:]:
+            wanted = {token: quality for quality, token in matches}
+            others.append((wanted, wanted.keys()))
+
+        # Driver matches are visited best first, so stop once the page is full
+        scores = {}
+        for quality, token in driver:
+            for doc_id in self._team_postings(token, ranges):
+                if doc_id in scores:
+                    continue
+                score = quality
+                doc_tokens = self.doc_tokens[doc_id]
+                for wanted, wanted_tokens in others:
+                    common = doc_tokens & wanted_tokens
+                    if not common:
+                        break
+                    score += max(wanted[t] for t in common)
+                else:
+                    scores[doc_id] = score
+                    if len(scores) >= limit:
+                        break
+            if len(scores) >= limit:
+                break
+
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))[:limit]
+        return [self.docs[doc_id] for doc_id in ranked]
+
+
+_search_indexes = {}   # link index version -> SearchIndex
+_search_index_lock = threading.Lock()
+
+
+def _remember(index):
+    # Keep the previous version too: requests still holding the old
+    # LinkIndex find its SearchIndex until they pick up the new one
+    _search_indexes[index.version] = index
+    while len(_search_indexes) > 2:
+        del _search_indexes[next(iter(_search_indexes))]
+
+
+def get_search_index(link_index):
+    """
+    Return the SearchIndex for `link_index`. Watched link sources have it
+    published with the LinkIndex (see watcher.py); otherwise it is built
+    here, once per version.
+    """
+    index = _search_indexes.get(link_index.version)
+    if index is not None:
+        return index
+    with _search_index_lock:
+        index = _search_indexes.get(link_index.version)
+        if index is None:
+            index = SearchIndex(link_index)
+            _remember(index)
+        return index
+
+
+def publish_search_index(index):
+    """Install a SearchIndex built off the request path."""
+    with _search_index_lock:
+        _remember(index)
+
+
+# -----------------
+# Route
+# -----------------
+def register_search(app):
+    """Attach the /search JSON endpoint used by the topbar search box."""
+
+    @app.route("/search")
+    @login_required
+    def search():
+        query = request.args.get("q", "").strip()
+        try:
+            limit = max(1, min(int(request.args.get("limit", 20)), 50))
+        except ValueError:
+            limit = 20
+        if not query:
+            return jsonify({"query": query, "results": []})
+
+        teams = {t.lower() for t in current_user.get_team_names()}
+        with timed("search"):
+            index = get_search_index(get_link_index(current_app.config["LINKS_SOURCE"]))
+            hits = index.search(query, teams, limit=limit)
+
+        return jsonify({
+            "query": query,
+            "results": [
+                {
+                    "title": link.Title,
+                    "href": link.href,
+                    "target": link.target,
+                    "icon": link.Icon,
+                    "team": team,
+                }
+                for team, link in hits
+            ],
+        })
@@ -1,49 +1,84 @@
-#security.py
-from flask import request
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-
-limiter = None
-
-def register_security_features(app):
-    """Attach Flask-Limiter safely to routes."""
-    global limiter
-    limiter = Limiter(
-        key_func=get_remote_address,
-        app=app,
-        default_limits=["200 per day", "50 per hour"],
-        storage_uri="memory://"
-    )
-
-    # Rate-limit home
-    if 'home' in app.view_functions:
-        limiter.limit("30 per minute")(app.view_functions['home'])
-
-    # Rate-limit team_page
-    if 'team_page' in app.view_functions:
-        limiter.limit("30 per minute")(app.view_functions['team_page'])
-
-    # Rate-limit login with username/IP key
-    if 'login' in app.view_functions:
-        limiter.limit("5 per 15 minutes", key_func=_login_key)(app.view_functions['login'])
-
-    # 429 logging
-    _setup_rate_limit_logging(app)
-
-def _login_key():
-    return request.form.get('username') or get_remote_address()
-
-def _setup_rate_limit_logging(app):
-    @app.errorhandler(429)
-    def too_many_requests(error):
-        limit_info = getattr(error, "description", "Rate limit exceeded")
-        app.logger.warning(
-            f"429 Too Many Requests: {limit_info}\n"
-            f"Path: {request.path}\n"
-            f"Client IP: {request.remote_addr}\n"
-            f"User Agent: {request.user_agent}\n"
-        )
-        return (
-            app.jinja_env.get_template('errors/429.html').render(error=error),
-            429
-        )
+#security.py
+import os
+from flask import request
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+import ratelimit  # noqa: F401  registers the sqlite:// limits storage
+from errors import error_page
+
+limiter = None
+
+def default_storage_uri(app):
+    """
+    RATELIMIT_STORAGE_URI if set (e.g. redis://host:6379), otherwise a SQLite
+    file in the instance folder so every worker on the host shares counters.
+    """
+    uri = os.getenv("RATELIMIT_STORAGE_URI")
+    if uri:
+        return uri
+    return "sqlite:///" + os.path.join(app.instance_path, "ratelimit.db")
+
+def register_security_features(app):
+    """Attach Flask-Limiter safely to routes."""
+    global limiter
+    limiter = Limiter(
+        key_func=get_remote_address,
+        app=app,
+        default_limits=["200 per day", "50 per hour"],
+        storage_uri=app.config.get("RATELIMIT_STORAGE_URI") or default_storage_uri(app),
+        strategy=app.config.get("RATELIMIT_STRATEGY", "sliding-window-counter"),
+    )
+
+    # Rate-limit home
+    if 'home' in app.view_functions:
+        app.view_functions['home'] = limiter.limit("30 per minute")(app.view_functions['home'])
+
+    # Rate-limit team_page
+    if 'team_page' in app.view_functions:
+        app.view_functions['team_page'] = limiter.limit("30 per minute")(app.view_functions['team_page'])
+
+    # Rate-limit login attempts (POSTs only) per email + IP, and per IP
+    # so one client can't spray passwords across many accounts
+    if 'login' in app.view_functions:
+        login_view = limiter.limit(
+            "5 per 15 minutes", key_func=_login_key, methods=["POST"]
+        )(app.view_functions['login'])
+        app.view_functions['login'] = limiter.limit(
+            "20 per 15 minutes", key_func=get_remote_address, methods=["POST"]
+        )(login_view)
+
+    # JSON API and search-as-you-type poll, so allow more than the page defaults
+    for endpoint in ('api_teams', 'api_team_links', 'search'):
+        if endpoint in app.view_functions:
+            app.view_functions[endpoint] = limiter.limit("120 per minute")(app.view_functions[endpoint])
+
+    # Metrics scrapes (admins / METRICS_TOKEN only) must not eat into the limits
+    if 'metrics' in app.view_functions:
+        limiter.exempt(app.view_functions['metrics'])
+
+    # Fingerprinted bundles are cached forever; don't count re-fetches either
+    if 'asset' in app.view_functions:
+        limiter.exempt(app.view_functions['asset'])
+
+    # 429 logging
+    _setup_rate_limit_logging(app)
+
+def _login_key():
+    email = request.form.get('email', '').strip().lower()
+    return f"{email}|{get_remote_address()}"
+
+def _setup_rate_limit_logging(app):
+    @app.errorhandler(429)
+    def too_many_requests(error):
+        limit_info = getattr(error, "description", "Rate limit exceeded")
+        app.logger.warning(
+            f"429 Too Many Requests: {limit_info}",
+            extra={
+                "code": 429,
+                "path": request.path,
+                "ip": request.remote_addr,
+                "agent": str(request.user_agent),
+            },
+        )
+        return error_page(429)
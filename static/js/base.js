@@ -0,0 +1,61 @@
+const sidebar = document.getElementById('sidebar');
+const toggle = document.querySelector('.menu-toggle');
+const closeMenu = document.querySelector('.close-menu');
+const searchBox = document.getElementById('searchBox');
+const searchIcon = document.getElementById('searchIcon');
+const searchInput = document.getElementById('search');
+
+// Sidebar toggle
+toggle.addEventListener('click', () => sidebar.classList.add('active'));
+closeMenu.addEventListener('click', () => sidebar.classList.remove('active'));
+
+// Toggle search box
+searchIcon.addEventListener('click', () => {
+  searchBox.classList.toggle('active');
+  if (searchBox.classList.contains('active')) {
+    searchInput.focus();
+  } else {
+    searchInput.value = '';
+    document.querySelectorAll('.card').forEach(card => card.style.display = '');
+  }
+});
+
+// 🔍 Live search filter (cards)
+searchInput.addEventListener('input', () => {
+  const filter = searchInput.value.toLowerCase();
+  document.querySelectorAll('.card').forEach(card => {
+    const text = card.innerText.toLowerCase();
+    card.style.display = text.includes(filter) ? '' : 'none';
+  });
+});
+
+// 🔎 Search links across all of the user's teams
+const searchResults = document.getElementById('searchResults');
+if (searchResults) {
+  let searchTimer;
+  searchInput.addEventListener('input', () => {
+    clearTimeout(searchTimer);
+    const query = searchInput.value.trim();
+    if (!query) {
+      searchResults.classList.remove('active');
+      return;
+    }
+    searchTimer = setTimeout(async () => {
+      const response = await fetch(`${searchResults.dataset.url}?q=${encodeURIComponent(query)}`);
+      if (!response.ok) return;
+      const data = await response.json();
+      searchResults.replaceChildren(...data.results.map(result => {
+        const a = document.createElement('a');
+        a.href = result.href;
+        a.target = result.target;
+        const icon = document.createElement('i');
+        icon.className = result.icon;
+        const team = document.createElement('small');
+        team.textContent = result.team;
+        a.append(icon, ' ' + result.title, team);
+        return a;
+      }));
+      searchResults.classList.toggle('active', data.results.length > 0);
+    }, 150);
+  });
+}
@@ -0,0 +1,13 @@
+function toggleSection(id) {
+    // Hide all
+    document.querySelectorAll(".link-section").forEach(sec => {
+        sec.style.display = "none";
+    });
+
+    // Show selected
+    const section = document.getElementById(id);
+    section.style.display = "block";
+
+    // Smooth scroll into view
+    section.scrollIntoView({ behavior: "smooth", block: "start" });
+}
@@ -0,0 +1,48 @@
+(function(){
+    const form = document.getElementById('loginForm');
+    const email = document.getElementById('email');
+    const pwd = document.getElementById('password');
+    const emailError = document.getElementById('emailError');
+    const pwdError = document.getElementById('passwordError');
+    const toggle = document.getElementById('togglePwd');
+
+    toggle.addEventListener('click', () => {
+        const isPwd = pwd.type === 'password';
+        pwd.type = isPwd ? 'text' : 'password';
+        toggle.textContent = isPwd ? 'Hide' : 'Show';
+        toggle.setAttribute('aria-label', isPwd ? 'Hide password' : 'Show password');
+    });
+
+    function validateEmail(v){
+        // simple email check
+        return /^[^\s@]+@[^\s@]+\.[^\s@]+$/.test(v);
+    }
+
+    form.addEventListener('submit', function(e){
+        let ok = true;
+        emailError.style.display = 'none';
+        pwdError.style.display = 'none';
+
+        if(!email.value || !validateEmail(email.value)){
+            emailError.textContent = 'Please enter a valid email address';
+            emailError.style.display = 'block';
+            ok = false;
+        }
+        if(!pwd.value || pwd.value.length < 6){
+            pwdError.textContent = 'Password must be at least 6 characters';
+            pwdError.style.display = 'block';
+            ok = false;
+        }
+
+        if(!ok){
+            e.preventDefault();
+            // focus first invalid
+            if(emailError.style.display === 'block') email.focus();
+            else pwd.focus();
+        }
+    });
+
+    // optional: enable Enter to submit from password field (native), and basic accessibility
+    email.addEventListener('input', ()=>{ if(emailError.style.display==='block') emailError.style.display='none'; });
+    pwd.addEventListener('input', ()=>{ if(pwdError.style.display==='block') pwdError.style.display='none'; });
+})();
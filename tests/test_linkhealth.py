@@ -0,0 +1,192 @@
+# tests/test_linkhealth.py
+"""
+Link health checker against local stand-in servers.
+
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import linkhealth  # noqa: E402
+from linkhealth import LinkHealthChecker, LinkHealthStore, register_link_health  # noqa: E402
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """
+    /ok       200 with an ETag, 304 when it is sent back
+    /missing  404
+    /nohead   405 to HEAD, 200 to GET
+    /slow     200 after `delay` seconds
+    /sso      401 (login required)
+    /private  403
+    """
+    delay = 0.3
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def do_GET(self):
+        self.respond(head=False)
+
+    def respond(self, head):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            server.hits.append((self.command, self.path))
+        try:
+            path = self.path.split("?")[0]
+            if path == "/ok":
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.send_response(304)
+                else:
+                    self.send_response(200)
+                    self.send_header("ETag", '"v1"')
+            elif path == "/nohead" and head:
+                self.send_response(405)
+            elif path == "/nohead":
+                self.send_response(200)
+            elif path == "/sso":
+                self.send_response(401)
+            elif path == "/private":
+                self.send_response(403)
+            elif path == "/slow":
+                time.sleep(self.delay)
+                self.send_response(200)
+            else:
+                self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    server.lock = threading.Lock()
+    server.active = server.peak = 0
+    server.hits = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class LinkHealthTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = start_server()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = LinkHealthStore(os.path.join(self.tmp.name, "link_health.json"))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def checker(self, **options):
+        return LinkHealthChecker(self.store, **options)
+
+    def test_ok_and_broken(self):
+        counts = self.checker().check_all([self.base + "/ok", self.base + "/missing"])
+        self.assertEqual(counts["checked"], 2)
+        self.assertEqual(counts["broken"], 1)
+        self.assertEqual(self.store.broken(), frozenset({self.base + "/missing"}))
+        self.assertEqual(self.store.results()[self.base + "/ok"].etag, '"v1"')
+
+    def test_login_required_is_reachable(self):
+        counts = self.checker().check_all([self.base + "/sso", self.base + "/private"])
+        self.assertEqual(counts["broken"], 0)
+        self.assertEqual(self.store.results()[self.base + "/sso"].status, 401)
+        # 403 to HEAD is retried with GET, which is refused the same way
+        self.assertEqual(self.server.hits.count(("GET", "/private")), 1)
+
+    def test_get_when_head_refused(self):
+        self.checker().check_all([self.base + "/nohead"])
+        self.assertTrue(self.store.results()[self.base + "/nohead"].ok)
+        self.assertEqual(self.server.hits, [("HEAD", "/nohead"), ("GET", "/nohead")])
+
+    def test_conditional_recheck_keeps_result(self):
+        url = self.base + "/ok"
+        self.checker().check_all([url])
+        first = self.store.results()[url]
+        time.sleep(0.01)
+        self.checker(ttl=0).check_all([url])
+        second = self.store.results()[url]
+        self.assertTrue(second.ok)
+        self.assertEqual(second.status, 200)
+        self.assertGreater(second.checked_at, first.checked_at)
+
+    def test_fresh_results_are_not_rechecked(self):
+        self.checker().check_all([self.base + "/ok"])
+        counts = self.checker().check_all([self.base + "/ok"])
+        self.assertEqual((counts["checked"], counts["fresh"]), (0, 1))
+        self.assertEqual(len(self.server.hits), 1)
+
+    def test_timeout_is_broken(self):
+        self.checker(timeout=0.05).check_all([self.base + "/slow"])
+        result = self.store.results()[self.base + "/slow"]
+        self.assertFalse(result.ok)
+        self.assertEqual(result.error, "ReadTimeout")
+
+    def test_per_host_limit(self):
+        urls = [f"{self.base}/slow?{i}" for i in range(6)]
+        self.checker(per_host=2, workers=8).check_all(urls)
+        self.assertEqual(self.server.peak, 2)
+        self.assertEqual(len(self.store.results()), 6)
+
+    def test_slow_host_does_not_hold_the_pool(self):
+        other = start_server()
+        try:
+            fast_base = f"http://localhost:{other.server_address[1]}"
+            urls = [f"{self.base}/slow?{i}" for i in range(4)] + [f"{fast_base}/ok?{i}" for i in range(4)]
+            checker = self.checker(per_host=1, workers=2)
+            order = [r.url for r in checker._check_by_host(urls, {})]
+            # The fast host's checks all finish while the slow host is on its first
+            self.assertEqual(order[:4], [f"{fast_base}/ok?{i}" for i in range(4)])
+        finally:
+            other.shutdown()
+            other.server_close()
+
+    def test_one_elected_checker(self):
+        lock_path = os.path.join(self.tmp.name, "link_health.json.checker")
+        first = linkhealth._elect_checker(lock_path)
+        self.assertIsNotNone(first)
+        if linkhealth.fcntl is not None:
+            self.assertIsNone(linkhealth._elect_checker(lock_path))
+        first.close()
+        second = linkhealth._elect_checker(lock_path)
+        self.assertIsNotNone(second)
+        second.close()
+
+    def test_thread_starts_on_first_request_only(self):
+        app = Flask(__name__)
+        app.config.update(
+            LINK_HEALTH_FILE=self.store.path, LINK_HEALTH_INTERVAL=3600, LINKS_SOURCE=self.tmp.name,
+        )
+        register_link_health(app)
+
+        def checkers():
+            return [t for t in threading.enumerate() if t.name == "link-health"]
+
+        self.assertEqual(checkers(), [])
+        client = app.test_client()
+        client.get("/")
+        client.get("/")
+        self.assertEqual(len(checkers()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,53 +1,249 @@
-# um.py
-from flask import request, render_template, flash, redirect, url_for
-from flask_login import login_user as flask_login_user, logout_user as flask_logout_user
-from werkzeug.security import check_password_hash
-from models import User
-from errors import InvalidCredentialsError
-
-
-def handle_login():
-    """Handle /login route (GET & POST)."""
-
-    # First load page
-    if request.method == 'GET':
-        return render_template('login.html')
-
-    # POST login attempt
-    email = request.form.get('email', '').strip()
-    password = request.form.get('password', '').strip()
-
-    print(f"[DEBUG] POST /login email={email}")
-
-    # Fetch user from DB
-    user = User.query.filter_by(email=email).first()
-
-    if not user:
-        flash("Invalid email or password", "danger")
-        print("[DEBUG] No such user in DB")
-        return render_template("login.html")
-
-    # Check password
-    if not check_password_hash(user.password_hash, password):
-        flash("Invalid email or password", "danger")
-        print("[DEBUG] Password mismatch")
-        return render_template("login.html")
-
-    print("[DEBUG] Login successful for:", user.email)
-
-    # Login with Flask-Login
-    flask_login_user(user)
-
-    flash(f"Welcome back, {user.email}!", "success")
-
-    # Redirect to team page if exists
-    team_names = user.get_team_names()
-    if team_names:
-        return redirect(url_for('team_page', team_name=team_names[0]))
-
-    return redirect(url_for('home'))
-
-
-def logout_current_user():
-    flask_logout_user()
-    return redirect(url_for('home'))
+# um.py
+import os
+import secrets
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import request, render_template, flash, redirect, url_for, session, current_app
+from flask_login import UserMixin, login_user as flask_login_user, logout_user as flask_logout_user
+from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from models import db, User
+from errors import InvalidCredentialsError, LoginBusyError
+
+PRINCIPAL_KEY = "principal"
+
+
+def handle_login():
+    """Handle /login route (GET & POST)."""
+
+    # First load page
+    if request.method == 'GET':
+        return render_template('login.html')
+
+    # POST login attempt
+    email = request.form.get('email', '').strip()
+    password = request.form.get('password', '').strip()
+
+    # Fetch user, hash and teams in one query
+    user = db.session.execute(
+        select(User)
+        .options(joinedload(User.memberships))
+        .where(User.email == email)
+    ).unique().scalar_one_or_none()
+
+    # Check password off the request thread; unknown emails are verified
+    # against a dummy hash so both cases take the same time
+    verifier = current_app.extensions["password_verifier"]
+    valid, new_hash = verifier.verify(user.password_hash if user else None, password)
+
+    if not valid:
+        flash("Invalid email or password", "danger")
+        return render_template("login.html")
+
+    if new_hash:
+        # Stored hash used an outdated method/cost
+        user.password_hash = new_hash
+        db.session.commit()
+
+    # Login with Flask-Login
+    flask_login_user(user)
+    remember_principal(user)
+
+    flash(f"Welcome back, {user.email}!", "success")
+
+    # Redirect to team page if exists
+    team_names = user.get_team_names()
+    if team_names:
+        return redirect(url_for('team_page', team_name=team_names[0]))
+
+    return redirect(url_for('home'))
+
+
+# -----------------------------
+# Password verification pool
+# -----------------------------
+class PasswordVerifier:
+    """
+    Verifies password hashes on a bounded thread pool (hashlib releases the
+    GIL while hashing, so checks run in parallel).
+    - at most `workers` checks run at once, and at most `max_queue` more wait;
+      beyond that `verify` raises LoginBusyError at once instead of queueing
+    - hashes not made with `method` are re-hashed after a successful check
+    The limits are per process; they only come into play when a process
+    serves several requests at once (gthread workers, see gunicorn.conf.py).
+    """
+
+    def __init__(self, workers=None, max_queue=None, method="scrypt", timeout=30):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = self.workers * 4 if max_queue is None else max_queue
+        self.method = method
+        self.timeout = timeout
+        # Both cost a full hash, so they're made on first use, not at startup
+        self.method_params = None
+        self._dummy_hash = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.rejected = 0
+
+    def _get_pool(self):
+        # Created on first use so forked workers each start their own threads
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="login-verify")
+            return self._pool
+
+    def _prepare(self):
+        if self._dummy_hash is not None:
+            return
+        with self._pool_lock:
+            if self._dummy_hash is None:
+                # "scrypt" -> "scrypt:32768:8:1", the prefix stored in each hash
+                self.method_params = generate_password_hash("", self.method).split("$", 1)[0]
+                self._dummy_hash = generate_password_hash(secrets.token_hex(16), self.method)
+
+    def needs_rehash(self, password_hash):
+        self._prepare()
+        return password_hash.split("$", 1)[0] != self.method_params
+
+    def _check(self, password_hash, password):
+        if password_hash is None:
+            check_password_hash(self._dummy_hash, password)
+            return False, None
+        if not check_password_hash(password_hash, password):
+            return False, None
+        if self.needs_rehash(password_hash):
+            return True, generate_password_hash(password, self.method)
+        return True, None
+
+    def verify(self, password_hash, password):
+        """
+        Return (valid, new hash or None). `password_hash` None means no
+        such user. Raises LoginBusyError when the queue is full or the
+        check takes longer than `timeout` seconds.
+        """
+        self._prepare()
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise LoginBusyError("Login queue is full")
+        try:
+            future = self._get_pool().submit(self._check, password_hash, password)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise LoginBusyError("Password check timed out")
+
+
+def init_login_pipeline(app):
+    """
+    Attach the PasswordVerifier. Config: LOGIN_VERIFY_WORKERS,
+    LOGIN_VERIFY_QUEUE, PASSWORD_HASH_METHOD.
+    """
+    app.config.setdefault("LOGIN_VERIFY_WORKERS", int(os.getenv("LOGIN_VERIFY_WORKERS", "0")) or None)
+    app.config.setdefault("LOGIN_VERIFY_QUEUE", int(os.getenv("LOGIN_VERIFY_QUEUE", "-1")))
+    app.config.setdefault("PASSWORD_HASH_METHOD", os.getenv("PASSWORD_HASH_METHOD", "scrypt"))
+
+    queue = app.config["LOGIN_VERIFY_QUEUE"]
+    verifier = PasswordVerifier(
+        workers=app.config["LOGIN_VERIFY_WORKERS"],
+        max_queue=None if queue < 0 else queue,
+        method=app.config["PASSWORD_HASH_METHOD"],
+    )
+    app.extensions["password_verifier"] = verifier
+    return verifier
+
+
+def logout_current_user():
+    flask_logout_user()
+    session.pop(PRINCIPAL_KEY, None)
+    return redirect(url_for('home'))
+
+
+# -----------------------------
+# Session-backed user principal
+# -----------------------------
+class SessionUser(UserMixin):
+    """
+    Lightweight user rebuilt from the signed session cookie.
+    Exposes the read-only parts of `User` used by views and templates.
+    """
+
+    def __init__(self, principal):
+        self.id = principal["i"]
+        self.email = principal["e"]
+        self.role = principal["r"]
+        self.auth_epoch = principal["v"]
+        self._team_names = tuple(principal["t"])
+        self._team_set = frozenset(t.lower() for t in self._team_names)
+
+    def get_id(self):
+        return self.id
+
+    def get_team_names(self):
+        return list(self._team_names)
+
+    def has_team(self, team_name):
+        return team_name.lower() in self._team_set
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "email": self.email,
+            "role": self.role,
+            "teams": self.get_team_names(),
+        }
+
+
+def principal_enabled():
+    return current_app.config.get("SESSION_PRINCIPAL", False)
+
+
+def remember_principal(user):
+    """Store a compact principal for `user` in the session (if enabled)."""
+    if not principal_enabled():
+        return
+    session[PRINCIPAL_KEY] = {
+        "i": str(user.id),
+        "e": user.email,
+        "r": user.role,
+        "t": user.get_team_names(),
+        "v": user.auth_epoch or 0,
+        "c": int(time.time()),
+    }
+
+
+def load_session_user(user_id):
+    """
+    Rebuild the user from the session principal without touching the DB.
+    Once the principal is older than SESSION_PRINCIPAL_TTL seconds, its
+    auth epoch is re-checked with one primary-key lookup.
+    Returns None when the principal is missing or stale.
+    """
+    if not principal_enabled():
+        return None
+
+    principal = session.get(PRINCIPAL_KEY)
+    if not principal or principal.get("i") != user_id:
+        return None
+
+    now = int(time.time())
+    ttl = current_app.config.get("SESSION_PRINCIPAL_TTL", 60)
+    if now - principal.get("c", 0) > ttl:
+        epoch = db.session.execute(
+            select(User.auth_epoch).where(User.id == uuid.UUID(user_id))
+        ).scalar_one_or_none()
+        if epoch is None or epoch != principal.get("v"):
+            session.pop(PRINCIPAL_KEY, None)
+            return None
+        principal["c"] = now
+        session[PRINCIPAL_KEY] = principal
+
+    return SessionUser(principal)
@@ -0,0 +1,64 @@
+# warmup.py
+import gc
+import time
+
+from helpers import get_link_index, workbook_cache
+from search import get_search_index
+from models import db
+from pagecache import fragment_cache
+
+
+# -----------------
+# Preloaded workers (gunicorn --preload, see gunicorn.conf.py)
+# -----------------
+def warm_up(app):
+    """
+    Run once in the master before workers are forked.
+    - Parse the link files and build the LinkIndex and SearchIndex here,
+      so every worker starts with them instead of parsing on its first
+      requests.
+    - Drop the parsed sheet rows; only the compact Link tuples (with
+      interned icon/team strings) stay referenced.
+    - Collect, then gc.freeze() what is left: the frozen objects are
+      never scanned by a worker's collector, so their pages stay shared
+      copy-on-write instead of being copied into every worker.
+    Returns the number of links loaded.
+    """
+    start = time.perf_counter()
+
+    with app.app_context():
+        index = get_link_index(app.config["LINKS_SOURCE"])
+        get_search_index(index)
+        # Compile the home page and render its sections once. Not through a
+        # request: that would count against the rate limits and start the
+        # per-process threads (watcher, link health) here in the master.
+        with app.test_request_context("/"):
+            app.jinja_env.get_template("index.html")
+            for team in ("scipher", "roc"):
+                fragment_cache.render("partials/link_cards.html", team, index, card_class="link-card")
+        # Connections must not be shared with the children
+        db.engine.dispose()
+
+    workbook_cache.clear()
+    gc.collect()
+    gc.freeze()
+
+    count = sum(len(links) for links in index.teams.values())
+    print(f"[WARMUP] {count} links in {len(index.teams)} teams ready in {time.perf_counter() - start:.2f}s")
+    return count
+
+
+def after_fork(app):
+    """
+    Run in each worker right after the fork.
+    - Drop the pooled connections inherited from the master without closing them.
+    - Replace locks the master's background threads may have held mid-fork.
+    The worker's link watcher starts with its first request and reuses the
+    index built by warm_up (see watcher.start_link_watcher). So does the
+    link health thread; the workers elect one to run the checks (see
+    linkhealth._health_loop).
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+    app.extensions["link_health"].reset_after_fork()
@@ -0,0 +1,143 @@
+# watcher.py
+import os
+import threading
+import time
+
+from helpers import (
+    source_signature, load_link_sheets, build_link_index, publish_link_index, loaded_link_index,
+)
+from search import SearchIndex, publish_search_index
+
+
+def validate_sheets(sheets):
+    """Reject workbooks that would render as an empty or broken page."""
+    if not sheets:
+        raise ValueError("workbook has no sheets")
+    if not any(sheets.values()):
+        raise ValueError("workbook has no link rows")
+    for name, rows in sheets.items():
+        if rows and "URL" not in rows[0]:
+            raise ValueError(f"sheet '{name}' has no URL column")
+
+
+class LinkIndexWatcher(threading.Thread):
+    """
+    Polls the (path, mtime, size) signature of the link source (one
+    workbook or a directory of link files) and hot-swaps the shared
+    LinkIndex when it changes.
+    - A new signature must be seen on two consecutive polls before it is
+      parsed, so a file that is still being written is left alone.
+    - Parsing, validation and the search index build happen on this
+      thread; requests keep serving the current index and never wait on
+      a reload.
+    - A file that fails to parse or validate is skipped (and not retried
+      until it changes again); the last good index stays live.
+    """
+
+    def __init__(self, app, source, interval=2.0):
+        super().__init__(name="links-watcher", daemon=True)
+        self.app = app
+        self.path = os.path.abspath(source)
+        self.interval = interval
+        self.version = None    # signature of the live index
+        self._pending = None   # signature seen on the previous poll
+        self._failed = None    # signature that failed to load
+        self._stop_event = threading.Event()
+        self.reloads = 0
+        self.failures = 0
+
+    def load(self):
+        """Parse, validate and publish the link files. Returns True on success."""
+        signature = None
+        try:
+            signature = source_signature(self.path)
+            with self.app.app_context():
+                sheets = load_link_sheets([entry[0] for entry in signature])
+                validate_sheets(sheets)
+                last_modified = max(entry[1] for entry in signature) / 1e9
+                index = build_link_index(sheets, signature, last_modified=last_modified)
+            search_index = SearchIndex(index)
+        except Exception as e:
+            self._failed = signature
+            self.failures += 1
+            print(f"[WATCH] Keeping current links, could not load {self.path}: {e}")
+            return False
+
+        if source_signature(self.path) != signature:
+            # Rewritten while we were parsing; pick it up on the next polls
+            return False
+
+        # Search first, so a request that sees the new links finds its SearchIndex
+        publish_search_index(search_index)
+        publish_link_index(self.path, index)
+        self.version = signature
+        self._failed = None
+        return True
+
+    def poll(self):
+        try:
+            signature = source_signature(self.path)
+        except OSError:
+            return   # mid-replace or removed; keep serving the current index
+
+        if signature == self.version or signature == self._failed:
+            self._pending = None
+            return
+        if signature != self._pending:
+            self._pending = signature
+            return
+
+        start = time.perf_counter()
+        if self.load():
+            self.reloads += 1
+            print(f"[WATCH] Reloaded {self.path} in {time.perf_counter() - start:.2f}s")
+        self._pending = None
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.poll()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def start_link_watcher(app, source):
+    """
+    Load `source` once, then keep it fresh from a background thread.
+    Disabled when LINKS_WATCH_INTERVAL is 0; requests then re-check the
+    files themselves (see helpers.get_link_index).
+    """
+    interval = app.config.get("LINKS_WATCH_INTERVAL", 0)
+    if interval <= 0 or not os.path.exists(source):
+        return None
+
+    watcher = LinkIndexWatcher(app, source, interval)
+    current = loaded_link_index(watcher.path)
+    if current is not None and current.version == source_signature(watcher.path):
+        # Already loaded (e.g. preloaded by warmup.warm_up); don't parse it again
+        watcher.version = current.version
+        publish_link_index(watcher.path, current)
+    elif not watcher.load():
+        return None
+    watcher.start()
+    app.extensions["links_watcher"] = watcher
+    return watcher
+
+
+def register_link_watcher(app):
+    """
+    Start the link watcher with the first request a process serves, so CLI
+    commands (init-db, provision-users, check-links, ...) never parse the
+    link files or poll them.
+    """
+    started = []   # pids; a forked worker has no watcher even if its parent started one
+    start_lock = threading.Lock()
+
+    @app.before_request
+    def start_watcher():
+        if os.getpid() in started:
+            return
+        with start_lock:
+            if os.getpid() not in started:
+                start_link_watcher(app, app.config["LINKS_SOURCE"])
+                started.append(os.getpid())